@@ -0,0 +1,68 @@
+import os
+import threading
+from urllib.parse import urlparse
+
+# Configuration
+CONNECT_TIMEOUT = float(os.getenv("CONNECT_TIMEOUT", "10"))  # Seconds to establish a connection
+READ_TIMEOUT = float(os.getenv("READ_TIMEOUT", "180"))  # Seconds to wait for the response
+MAX_CONNECTIONS = int(os.getenv("MAX_CONNECTIONS", "16"))  # Maximum number of open connections per endpoint
+
+# One pooled session per endpoint (scheme + host), shared by all the threads
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+# Function to get the shared session of an endpoint.
+# Connections are kept alive and reused between requests, avoiding a new TCP and TLS handshake for every slide.
+# When MAX_CONNECTIONS requests are already in flight, the next one waits for a free connection.
+def get_session(url):
+    parsed = urlparse(url)
+    key = f"{parsed.scheme}://{parsed.netloc}"
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            # Imported here to keep the startup fast, requests is only needed once the first request is sent
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONNECTIONS, pool_block=True)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[key] = session
+        return session
+
+def request(method, url, timeout=None, **kwargs):
+    return get_session(url).request(method, url, timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT), **kwargs)
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+# Generator yielding the data of each server-sent event of a streamed response (stream=True), until "[DONE]"
+def iter_sse(response):
+    response.encoding = 'utf-8'
+    data = []
+    for line in response.iter_lines(decode_unicode=True):
+        if line:
+            # Comments (keep-alives) and the other fields (event, id, retry) are ignored
+            if line.startswith("data:"):
+                data.append(line[5:].lstrip(" "))
+            continue
+        # An empty line ends the event
+        if data:
+            event = "\n".join(data)
+            data = []
+            if event == "[DONE]":
+                return
+            yield event
+    if data and "\n".join(data) != "[DONE]":
+        yield "\n".join(data)
+
+# Close all the pooled connections
+def close_sessions():
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,109 @@
+import os
+import json
+import time
+from urllib.parse import urlparse
+
+import api_client
+
+# Configuration
+BATCH_DIR = "batches"  # Directory where the batch input and output files are kept
+BATCH_POLL_INTERVAL = int(os.getenv("BATCH_POLL_INTERVAL", "30"))  # Seconds between two status checks
+BATCH_COMPLETION_WINDOW = "24h"
+
+# Final states of a batch, see https://platform.openai.com/docs/api-reference/batch
+BATCH_FINAL_STATES = ("completed", "failed", "expired", "cancelled")
+
+# Function to get the API base URL (e.g. https://api.openai.com/v1) and the endpoint path (e.g. /v1/chat/completions)
+# from the chat completions endpoint, so that the batch mode works with any compatible (or mock) server
+def split_endpoint(api_endpoint):
+    path = urlparse(api_endpoint).path
+    base_url = api_endpoint[:api_endpoint.rfind("/chat/completions")] if "/chat/completions" in api_endpoint \
+        else api_endpoint.rsplit("/", 1)[0]
+    return base_url, path
+
+# Writes the requests of a batch to a JSONL file, one line at a time so the whole batch is never held in memory
+class BatchFileWriter:
+    def __init__(self, path, api_endpoint):
+        self.path = path
+        self.endpoint_path = split_endpoint(api_endpoint)[1]
+        self.count = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.file = open(path, 'w', encoding='utf-8')
+
+    def add(self, custom_id, payload):
+        line = {"custom_id": custom_id, "method": "POST", "url": self.endpoint_path, "body": payload}
+        self.file.write(json.dumps(line, ensure_ascii=False) + "\n")
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+# Client for the batch API: upload the input file, create the batch, poll it and download the results
+class BatchClient:
+    def __init__(self, api_key, api_endpoint, poll_interval=BATCH_POLL_INTERVAL):
+        self.base_url, self.endpoint_path = split_endpoint(api_endpoint)
+        self.headers = {"Authorization": f"Bearer {api_key}"}
+        self.poll_interval = poll_interval
+
+    def upload(self, path):
+        with open(path, 'rb') as file:
+            response = api_client.post(
+                f"{self.base_url}/files", headers=self.headers,
+                data={"purpose": "batch"}, files={"file": (os.path.basename(path), file, "application/jsonl")}
+            )
+        response.raise_for_status()
+        return response.json()["id"]
+
+    def create(self, input_file_id):
+        response = api_client.post(
+            f"{self.base_url}/batches", headers=self.headers,
+            json={
+                "input_file_id": input_file_id,
+                "endpoint": self.endpoint_path,
+                "completion_window": BATCH_COMPLETION_WINDOW
+            }
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def retrieve(self, batch_id):
+        response = api_client.get(f"{self.base_url}/batches/{batch_id}", headers=self.headers)
+        response.raise_for_status()
+        return response.json()
+
+    # Poll the batch until it reaches a final state, reporting "completed/total" through status_callback
+    def wait(self, batch_id, status_callback=None):
+        while True:
+            batch = self.retrieve(batch_id)
+            if status_callback:
+                counts = batch.get("request_counts") or {}
+                status_callback(batch["status"], counts.get("completed", 0) + counts.get("failed", 0), counts.get("total", 0))
+            if batch["status"] in BATCH_FINAL_STATES:
+                return batch
+            time.sleep(self.poll_interval)
+
+    def download(self, file_id):
+        response = api_client.get(f"{self.base_url}/files/{file_id}/content", headers=self.headers)
+        response.raise_for_status()
+        return response.text
+
+    # Submit the batch file and return the response bodies by custom_id (requests that failed are missing)
+    def run(self, path, status_callback=None):
+        batch = self.create(self.upload(path))
+        batch = self.wait(batch["id"], status_callback)
+        if batch["status"] != "completed" and not batch.get("output_file_id"):
+            raise RuntimeError(f"Batch {batch['id']} ended with status '{batch['status']}'")
+
+        results = {}
+        if batch.get("output_file_id"):
+            output = self.download(batch["output_file_id"])
+            with open(os.path.splitext(path)[0] + "_output.jsonl", 'w', encoding='utf-8') as f:
+                f.write(output)
+            for line in output.splitlines():
+                if not line.strip():
+                    continue
+                result = json.loads(line)
+                response = result.get("response") or {}
+                if response.get("status_code") == 200:
+                    results[result["custom_id"]] = response["body"]
+        return results
@@ -0,0 +1,157 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+
+# End-to-end benchmark of the transcription pipeline and of the thumbnail loading, against a local mock endpoint.
+# A synthetic deck is generated, transcribed by TranscriptJob (what PDFProcessorThread runs in the GUI) with requests
+# sent to benchmarks/mock_llm_server.py, and loaded by PDFLoaderThread, run directly without the Qt event loop.
+# Everything is seeded and runs in a temporary directory, so it can run in CI.
+# With --batch, the deck is submitted through the mock batch API instead; failed batch requests are not retried.
+#
+#   python benchmarks/bench_pipeline.py --pages 100 --workers 8 --latency 500 --jitter 150 --error-rate 0.02 --json results.json
+#   python benchmarks/bench_pipeline.py --pages 100 --batch
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from synthetic_pdf import write_pdf
+from mock_llm_server import start_server
+from metrics import percentile
+
+# Function to get the peak resident memory in MB of this process and of its children (pdftoppm, extraction workers)
+def peak_rss_mb():
+    import resource
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return round(own, 1), round(children, 1)
+
+def bench_transcription(pdf_path, server, args):
+    from transcript_core import TranscriptJob
+    from scheduler import RequestScheduler
+
+    # No client-side quota, the mock server has none either
+    scheduler = RequestScheduler(max_concurrency=args.workers, requests_per_minute=0, tokens_per_minute=0)
+
+    # Time until the first piece of the notes is available
+    first_content = []
+
+    def live_callback(text):
+        if not first_content:
+            first_content.append(time.perf_counter() - start)
+
+    job = TranscriptJob(
+        pdf_path, "mock-key", server.url, args.model, args.workers, False, args.image_detail, args.batch,
+        dedup=args.dedup, scheduler=scheduler, report_dir="", stream=args.stream, live_callback=live_callback
+    )
+    start = time.perf_counter()
+    job.run(lambda final_transcript: None)
+    elapsed = time.perf_counter() - start
+
+    stages = job.metrics.report()["stages"]
+    requests = job.metrics.stages.get("request", [])
+    return {
+        "seconds": elapsed,
+        "slides_per_minute": job.num_slides / elapsed * 60,
+        "request_p50": percentile(requests, 0.5),
+        "request_p95": percentile(requests, 0.95),
+        "first_content_seconds": first_content[0] if first_content else elapsed,
+        "render_seconds": stages.get("render", {}).get("total_seconds", 0.0),
+        "text_seconds": stages.get("text", {}).get("total_seconds", 0.0),
+        "encode_seconds": stages.get("encode", {}).get("total_seconds", 0.0),
+        "retries": scheduler.retries,
+        "failed_slides": len(job.failed_slides),
+        "skipped_slides": len(job.duplicates)
+    }
+
+# Load the thumbnails twice: with an empty cache (every page rendered) and with the cache filled by the first load
+def bench_thumbnails(pdf_path, cache_dir):
+    from extract_pages import PDFLoaderThread
+    from thumbnail_cache import ThumbnailCache
+
+    results = {}
+    for name in ("cold", "warm"):
+        loader = PDFLoaderThread(pdf_path, ThumbnailCache(root=cache_dir))
+        first_page = []
+        errors = []
+        documents = []
+        start = time.perf_counter()
+        # run() is called in this thread, so the signals call the slots directly
+        loader.page_ready.connect(lambda i, path: first_page or first_page.append(time.perf_counter() - start))
+        loader.error.connect(errors.append)
+        loader.finished.connect(lambda page_images, document: documents.append(document))
+        loader.run()
+        elapsed = time.perf_counter() - start
+        if errors:
+            raise RuntimeError(errors[0])
+        for document in documents:
+            document.close()
+        results[f"thumbnails_{name}_seconds"] = elapsed
+        results[f"thumbnails_{name}_first_seconds"] = first_page[0] if first_page else elapsed
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the transcription pipeline against a local mock endpoint.")
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=3, help="repetitions, the median of each measure is reported")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent requests (1 = sequential with transcript context)")
+    parser.add_argument("--latency", type=float, default=500, help="mean response time of the mock endpoint in milliseconds")
+    parser.add_argument("--jitter", type=float, default=100, help="standard deviation of the response time in milliseconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests failing with 429 or 500")
+    parser.add_argument("--image-detail", default="low", choices=["auto", "low", "high", "none"])
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--build-every", type=int, default=0, help="make every N-th slide an incremental build")
+    parser.add_argument("--dedup", action="store_true", help="skip near-duplicate slides")
+    parser.add_argument("--stream", action="store_true", help="stream the responses")
+    parser.add_argument("--batch", action="store_true", help="submit the deck through the mock batch API")
+    parser.add_argument("--skip-thumbnails", action="store_true", help="only benchmark the transcription")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+    json_path = os.path.abspath(args.json) if args.json else None
+    # Poll the mock batches every second instead of every 30 s (read when batch_api is first imported)
+    os.environ.setdefault("BATCH_POLL_INTERVAL", "1")
+
+    runs = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Checkpoints, batch files and caches of the job stay in the temporary directory
+        os.chdir(work_dir)
+        pdf_path = write_pdf(os.path.join(work_dir, "deck.pdf"), args.pages, args.seed, args.build_every)
+
+        for run in range(args.runs):
+            server = start_server(args.latency / 1000, args.jitter / 1000, args.error_rate, seed=args.seed + run)
+            try:
+                result = bench_transcription(pdf_path, server, args)
+            finally:
+                server.shutdown()
+                server.server_close()
+            if not args.skip_thumbnails:
+                result.update(bench_thumbnails(pdf_path, os.path.join(work_dir, f"thumbnails_{run}")))
+            runs.append(result)
+            print(f"Run {run + 1}/{args.runs}: {result['seconds']:.2f}s, {result['slides_per_minute']:.1f} slides/min", flush=True)
+        os.chdir(REPO_DIR)
+
+    summary = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+    summary["peak_rss_mb"], summary["peak_children_rss_mb"] = peak_rss_mb()
+
+    print()
+    print(f"{args.pages} pages, {args.workers} workers, {args.latency:.0f}±{args.jitter:.0f}ms latency, "
+          f"{args.error_rate:.0%} errors (median of {args.runs} runs)")
+    for key, value in summary.items():
+        print(f"  {key:<32} {value:>10.3f}" if isinstance(value, float) else f"  {key:<32} {value:>10}")
+
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "summary": summary, "runs": runs}, f, indent=2)
+
+    # Fail in CI when slides are lost although the endpoint never fails for good
+    return 1 if summary["failed_slides"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
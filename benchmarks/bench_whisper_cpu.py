@@ -0,0 +1,103 @@
+import os
+import sys
+import gc
+import json
+import argparse
+
+# CPU benchmark of transcribe_audio.py: transcribes the same clip in float32 and with int8 linear layers,
+# and reports the real-time factor of each and the word error rate drift of the quantized model.
+# The WER is measured against a reference transcript if given, otherwise against the float32 transcription.
+# Use a fixed clip (a few minutes of a lecture) so the numbers can be compared between machines and versions.
+#
+#   python benchmarks/bench_whisper_cpu.py lecture_clip.m4a --threads 8 --reference lecture_clip.txt --json cpu.json
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import transcribe_audio
+
+# Function to split a text into lowercase words without punctuation
+def words(text):
+    return [w for w in (transcribe_audio.normalize_word(w) for w in text.split()) if w]
+
+# Function to compute the word error rate: word-level edit distance divided by the number of reference words
+def word_error_rate(reference, hypothesis):
+    reference, hypothesis = words(reference), words(hypothesis)
+    if not reference:
+        return 0.0 if not hypothesis else 1.0
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, start=1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, start=1):
+            current.append(min(
+                previous[j] + 1,  # Deletion
+                current[j - 1] + 1,  # Insertion
+                previous[j - 1] + (ref_word != hyp_word)  # Substitution
+            ))
+        previous = current
+    return previous[-1] / len(reference)
+
+# Function to transcribe the clip with one configuration, freeing the model afterwards
+def run(clip, args, quantize):
+    engine = transcribe_audio.TranscriptionEngine(
+        args.model, args.batch_size, cpu_mode=True, quantize=quantize, num_threads=args.threads,
+        interop_threads=args.interop_threads, attention=args.attention
+    )
+    # Warm-up on the clip, so the timed run does not include the first-call overheads
+    if args.warmup:
+        engine.transcribe(clip)
+    result = engine.transcribe(clip)
+    del engine
+    gc.collect()
+    if result is None:
+        raise RuntimeError(f"Transcription of {clip} failed")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare float32 and int8 Whisper inference on the CPU.")
+    parser.add_argument("clip", help="audio clip transcribed by both configurations")
+    parser.add_argument("--reference", help="text file with the correct transcript of the clip")
+    parser.add_argument("--model", default=transcribe_audio.model_id)
+    parser.add_argument("--batch-size", type=int, default=transcribe_audio.batch_size)
+    parser.add_argument("--threads", type=int, default=transcribe_audio.num_threads)
+    parser.add_argument("--interop-threads", type=int, default=transcribe_audio.interop_threads)
+    parser.add_argument("--attention", default=transcribe_audio.attention, choices=["sdpa", "eager"])
+    parser.add_argument("--warmup", action="store_true", help="transcribe the clip once before the timed run")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = {"float32": run(args.clip, args, quantize=False), "int8": run(args.clip, args, quantize=True)}
+    if args.reference:
+        with open(args.reference, encoding="utf-8") as f:
+            reference = f.read()
+    else:
+        reference = results["float32"]["transcription"]
+
+    summary = {}
+    for name, result in results.items():
+        summary[name] = {
+            "duration": result["duration"],
+            "seconds": result["seconds"],
+            "rtf": result["rtf"],
+            "wer": word_error_rate(reference, result["transcription"])
+        }
+    summary["speedup"] = results["float32"]["seconds"] / results["int8"]["seconds"] if results["int8"]["seconds"] else 0.0
+
+    print()
+    print(f"{os.path.basename(args.clip)}: {results['float32']['duration']:.1f}s of audio, {args.threads} threads, "
+          f"WER against {'the reference' if args.reference else 'float32'}")
+    for name in ("float32", "int8"):
+        print(f"  {name:<8} RTF {summary[name]['rtf']:.3f}  ({summary[name]['seconds']:.1f}s)  WER {summary[name]['wer']:.2%}")
+    print(f"  int8 speedup {summary['speedup']:.2f}x")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "settings": vars(args),
+                "summary": summary,
+                "transcriptions": {name: result["transcription"] for name, result in results.items()}
+            }, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
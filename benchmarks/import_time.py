@@ -0,0 +1,56 @@
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+# Cold-start benchmark: imports each module in fresh interpreters and reports the import time
+# and the heavy dependencies it pulled in.
+#
+#   python benchmarks/import_time.py --runs 10
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["PyQt5", "PyPDF2", "pdf2image", "PIL", "requests"]
+
+# transcript_core is what scripts needing only generate_transcript import,
+# transcript_generator is the GUI, which loads everything like the module did before the split
+DEFAULT_MODULES = ["transcript_core", "transcript_generator"]
+
+MEASURE_CODE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+# Function to import a module in a new interpreter, returning the import time and the heavy modules loaded
+def measure(module):
+    code = MEASURE_CODE.format(module=module, heavy=HEAVY_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=REPO_DIR, capture_output=True, text=True, check=True
+    )
+    elapsed, loaded = result.stdout.splitlines()[-2:]
+    return float(elapsed), loaded
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cold import time of the transcript modules.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--runs", type=int, default=10, help="number of fresh interpreters per module")
+    args = parser.parse_args()
+
+    print(f"{'module':<24} {'median':>10} {'min':>10} {'max':>10}  heavy modules loaded")
+    for module in args.modules:
+        try:
+            samples = [measure(module) for _ in range(args.runs)]
+        except subprocess.CalledProcessError as e:
+            print(f"{module:<24} failed to import: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        times = [elapsed for elapsed, _ in samples]
+        loaded = samples[-1][1] or "-"
+        print(f"{module:<24} {statistics.median(times) * 1000:>8.1f}ms {min(times) * 1000:>8.1f}ms "
+              f"{max(times) * 1000:>8.1f}ms  {loaded}")
+
+if __name__ == "__main__":
+    main()
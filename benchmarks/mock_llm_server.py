@@ -0,0 +1,288 @@
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from email import policy
+from email.parser import BytesParser
+from urllib.parse import urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the chat completions endpoint, so the pipeline can be measured without API credits.
+# Every request waits a configurable latency (with jitter) and fails with a configurable probability,
+# with rate limits (429 with Retry-After) or server errors (500). The delay and outcome of a request are drawn from the
+# seed, the request messages and the number of times they were sent before, so runs are repeatable whatever
+# the order the concurrent requests arrive in.
+# Streamed requests ("stream": true) get server-sent events: the first token after half the latency, the rest spread over it.
+# The batch API is mocked too (POST /files, POST /batches, GET /batches/{id}, GET /files/{id}/content): a batch runs all
+# its requests at once in the background, each with its own drawn outcome, and completes after the longest delay.
+#
+#   python benchmarks/mock_llm_server.py --port 8000 --latency 800 --jitter 200 --error-rate 0.02
+#   API_ENDPOINT=http://127.0.0.1:8000/v1/chat/completions python transcript_generator.py
+
+CHARS_PER_TOKEN = 4
+STREAM_CHUNKS = 20  # Number of content events of a streamed response
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.5, jitter=0.1, error_rate=0.0, completion_words=120, seed=0):
+        super().__init__(address, MockLLMHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.completion_words = completion_words
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.attempts = {}  # request key -> times it was received
+        self.requests = 0
+        self.errors = 0
+        self.files = {}  # file id -> content
+        self.batches = {}  # batch id -> batch object
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+
+    # Draw the delay and the outcome of a request; a retry of the same request gets a new draw
+    def next_response(self, payload):
+        key = hashlib.sha256(json.dumps(payload.get("messages", []), sort_keys=True).encode("utf-8")).hexdigest()
+        with self.lock:
+            self.requests += 1
+            attempt = self.attempts.get(key, 0)
+            self.attempts[key] = attempt + 1
+        rng = random.Random(f"{self.seed}:{key}:{attempt}")
+        delay = max(0.0, rng.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+        failed = rng.random() < self.error_rate
+        if failed:
+            with self.lock:
+                self.errors += 1
+        return delay, rng.choice((429, 500)) if failed else 200
+
+    # The chat completion answering a request
+    def completion(self, payload):
+        words = " ".join(["lorem"] * self.completion_words)
+        content = f"### Mock Slide\n\n{words}"
+        tokens = prompt_tokens(payload)
+        usage = {
+            "prompt_tokens": tokens,
+            "completion_tokens": len(content) // CHARS_PER_TOKEN,
+            "total_tokens": tokens + len(content) // CHARS_PER_TOKEN,
+            "prompt_tokens_details": {"cached_tokens": 0}
+        }
+        return {
+            "id": f"chatcmpl-mock-{self.requests}",
+            "object": "chat.completion",
+            "model": payload.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage
+        }
+
+    def add_file(self, content):
+        with self.lock:
+            file_id = f"file-mock-{len(self.files) + 1}"
+            self.files[file_id] = content
+        return file_id
+
+    def create_batch(self, input_file_id, endpoint):
+        with self.lock:
+            batch_id = f"batch_mock_{len(self.batches) + 1}"
+            batch = {
+                "id": batch_id,
+                "object": "batch",
+                "endpoint": endpoint,
+                "input_file_id": input_file_id,
+                "status": "in_progress",
+                "output_file_id": None,
+                "request_counts": {"total": 0, "completed": 0, "failed": 0}
+            }
+            self.batches[batch_id] = batch
+        threading.Thread(target=self.run_batch, args=(batch,), daemon=True).start()
+        return dict(batch)
+
+    # Answer every request of the batch input file and write the output file
+    def run_batch(self, batch):
+        lines = [json.loads(line) for line in self.files[batch["input_file_id"]].decode("utf-8").splitlines() if line.strip()]
+        with self.lock:
+            batch["request_counts"]["total"] = len(lines)
+
+        output = []
+        longest = 0.0
+        for number, line in enumerate(lines, start=1):
+            delay, status = self.next_response(line["body"])
+            longest = max(longest, delay)
+            if status == 200:
+                body = self.completion(line["body"])
+            else:
+                body = {"error": {"message": "Rate limit reached" if status == 429 else "Internal server error"}}
+            output.append({
+                "id": f"batch_req_{number}",
+                "custom_id": line["custom_id"],
+                "response": {"status_code": status, "request_id": f"req_{number}", "body": body},
+                "error": None
+            })
+        time.sleep(longest)
+
+        file_id = self.add_file("".join(json.dumps(line) + "\n" for line in output).encode("utf-8"))
+        with self.lock:
+            failed = sum(1 for line in output if line["response"]["status_code"] != 200)
+            batch["request_counts"].update(completed=len(output) - failed, failed=failed)
+            batch["output_file_id"] = file_id
+            batch["status"] = "completed"
+
+# Function to get the uploaded file of a multipart/form-data body
+def multipart_file(content_type, body):
+    message = BytesParser(policy=policy.default).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + body
+    )
+    for part in message.iter_parts():
+        if part.get_param("name", header="content-disposition") == "file":
+            return part.get_payload(decode=True)
+    return None
+
+# Function to count the tokens of a request the way the real API roughly would (text length, fixed cost per image)
+def prompt_tokens(payload):
+    tokens = 0
+    for message in payload.get("messages", []):
+        content = message.get("content", "")
+        if isinstance(content, str):
+            content = [{"type": "text", "text": content}]
+        for part in content:
+            tokens += len(part.get("text", "")) // CHARS_PER_TOKEN if part.get("type") == "text" else 85
+    return tokens
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real endpoint
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body, headers=()):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        parts = urlparse(self.path).path.rstrip("/").split("/")
+        with self.server.lock:
+            if len(parts) >= 2 and parts[-2] == "batches" and parts[-1] in self.server.batches:
+                batch = json.loads(json.dumps(self.server.batches[parts[-1]]))
+            else:
+                batch = None
+            content = self.server.files.get(parts[-2]) if len(parts) >= 3 and parts[-1] == "content" else None
+        if batch is not None:
+            self.send_json(200, batch)
+        elif content is not None:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/jsonl")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        else:
+            self.send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        path = urlparse(self.path).path.rstrip("/")
+
+        if path.endswith("/files"):
+            content = multipart_file(self.headers.get("Content-Type", ""), body)
+            if content is None:
+                self.send_json(400, {"error": {"message": "Missing file"}})
+                return
+            file_id = self.server.add_file(content)
+            self.send_json(200, {"id": file_id, "object": "file", "bytes": len(content), "purpose": "batch"})
+            return
+
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            self.send_json(400, {"error": {"message": "Invalid JSON"}})
+            return
+
+        if path.endswith("/batches"):
+            if payload.get("input_file_id") not in self.server.files:
+                self.send_json(400, {"error": {"message": "Unknown input file"}})
+                return
+            self.send_json(200, self.server.create_batch(payload["input_file_id"], payload.get("endpoint")))
+            return
+
+        delay, status = self.server.next_response(payload)
+        streamed = payload.get("stream") and status == 200
+        time.sleep(delay / 2 if streamed else delay)
+        if status == 429:
+            self.send_json(429, {"error": {"message": "Rate limit reached"}}, [("Retry-After", "0")])
+            return
+        if status != 200:
+            self.send_json(status, {"error": {"message": "Internal server error"}})
+            return
+
+        completion = self.server.completion(payload)
+        if streamed:
+            self.send_stream(payload, completion["choices"][0]["message"]["content"], completion["usage"], delay / 2)
+            return
+        self.send_json(200, completion)
+
+    # Send the content as server-sent events over a chunked response, taking `duration` seconds
+    def send_stream(self, payload, content, usage, duration):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send_event(data):
+            event = f"data: {data}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+            self.wfile.flush()
+
+        chunk_id = f"chatcmpl-mock-{self.server.requests}"
+        size = -(-len(content) // STREAM_CHUNKS)
+        for start in range(0, len(content), size):
+            if start:
+                time.sleep(duration / STREAM_CHUNKS)
+            send_event(json.dumps({
+                "id": chunk_id,
+                "object": "chat.completion.chunk",
+                "choices": [{"index": 0, "delta": {"content": content[start:start + size]}, "finish_reason": None}]
+            }))
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            send_event(json.dumps({"id": chunk_id, "object": "chat.completion.chunk", "choices": [], "usage": usage}))
+        send_event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+# Start a server in a background thread (port 0 picks a free port), returning it; call shutdown() to stop it
+def start_server(latency=0.5, jitter=0.1, error_rate=0.0, completion_words=120, seed=0, host="127.0.0.1", port=0):
+    server = MockLLMServer((host, port), latency, jitter, error_rate, completion_words, seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a mock chat completions endpoint.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=800, help="mean response time in milliseconds")
+    parser.add_argument("--jitter", type=float, default=200, help="standard deviation of the response time in milliseconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests failing with 429 or 500")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = MockLLMServer((args.host, args.port), args.latency / 1000, args.jitter / 1000, args.error_rate, seed=args.seed)
+    print(f"Mock chat completions endpoint at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
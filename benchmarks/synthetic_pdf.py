@@ -0,0 +1,92 @@
+import random
+import argparse
+
+# Generator of synthetic lecture decks for the benchmarks: 16:9 pages with a title, a few bullets and a coloured box,
+# written directly as PDF objects so no PDF library is needed. The same seed always gives the same file.
+#
+#   python benchmarks/synthetic_pdf.py deck.pdf --pages 200
+
+PAGE_WIDTH = 960
+PAGE_HEIGHT = 540
+WORDS = (
+    "gradient descent network layer activation loss function sample batch model training data set "
+    "feature vector matrix kernel convolution pooling attention token embedding encoder decoder "
+    "probability distribution inference graph node edge search heuristic agent reward policy value"
+).split()
+
+def escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+# Function to build the content stream of a slide.
+# With build_steps > 1, the slide is repeated revealing one more bullet each time, like an incremental build.
+def slide_streams(rng, slide_number, build_steps=1):
+    title = f"{slide_number}. {sentence(rng, 3)}"
+    bullets = [sentence(rng, rng.randint(5, 10)) for _ in range(max(build_steps, rng.randint(3, 6)))]
+    color = " ".join(f"{rng.random():.2f}" for _ in range(3))
+    box = (rng.randint(560, 760), rng.randint(80, 260), rng.randint(120, 180), rng.randint(100, 200))
+
+    streams = []
+    first_visible = len(bullets) - build_steps + 1 if build_steps > 1 else len(bullets)
+    for visible in range(first_visible, len(bullets) + 1):
+        lines = [f"BT /F1 34 Tf 60 460 Td ({escape(title)}) Tj ET"]
+        for j, bullet in enumerate(bullets[:visible]):
+            lines.append(f"BT /F1 18 Tf 80 {400 - j * 40} Td ({escape('- ' + bullet)}) Tj ET")
+        lines.append(f"{color} rg {box[0]} {box[1]} {box[2]} {box[3]} re f")
+        streams.append("\n".join(lines).encode("latin-1"))
+    return streams
+
+# Function to write a deck of num_pages pages to path.
+# Every build_every-th slide (0 = never) is an incremental build spread over 3 pages, to exercise the deduplication.
+def write_pdf(path, num_pages, seed=0, build_every=0):
+    rng = random.Random(seed)
+    contents = []
+    slide_number = 1
+    while len(contents) < num_pages:
+        build_steps = 3 if build_every and slide_number % build_every == 0 else 1
+        contents.extend(slide_streams(rng, slide_number, build_steps))
+        slide_number += 1
+    contents = contents[:num_pages]
+
+    # Objects 1-3 are the catalog, the page tree and the font, then a page and its content for every slide
+    page_ids = [4 + 2 * i for i in range(num_pages)]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {num_pages} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    ]
+    for page_id, content in zip(page_ids, contents):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode()
+        )
+        objects.append(f"<< /Length {len(content)} >>\nstream\n".encode() + content + b"\nendstream")
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+        xref_offset = f.tell()
+        f.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+        for offset in offsets:
+            f.write(f"{offset:010d} 00000 n \n".encode())
+        f.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode())
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic lecture PDF for the benchmarks.")
+    parser.add_argument("path")
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--build-every", type=int, default=0,
+                        help="make every N-th slide an incremental build over 3 pages (0 = none)")
+    args = parser.parse_args()
+    write_pdf(args.path, args.pages, args.seed, args.build_every)
+    print(f"Wrote {args.pages} pages to {args.path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import os
+import json
+import hashlib
+import threading
+
+# Configuration
+CHECKPOINT_DIR = "checkpoints"  # Directory holding the journals of the unfinished runs
+
+# Append-only JSONL journal of the transcripts generated during a run, one line per finished slide.
+# The journal is identified by the content of the PDF and the settings that change the transcripts,
+# so re-running on the same file with the same settings resumes from the slides that were not finished yet.
+class CheckpointJournal:
+    # file_hash is the SHA-256 of the PDF when the caller already computed it, the file is hashed otherwise
+    def __init__(self, pdf_path, settings, directory=CHECKPOINT_DIR, file_hash=None):
+        if file_hash is None:
+            file_digest = hashlib.sha256()
+            with open(pdf_path, 'rb') as file:
+                for block in iter(lambda: file.read(1024 * 1024), b""):
+                    file_digest.update(block)
+            file_hash = file_digest.hexdigest()
+        digest = hashlib.sha256(file_hash.encode("utf-8"))
+        digest.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+
+        pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{pdf_name}_{digest.hexdigest()[:16]}.jsonl")
+        self.transcripts = {}
+        self.lock = threading.Lock()
+
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Last line cut short by a crash
+                        continue
+                    self.transcripts[entry["slide"]] = entry["transcript"]
+
+        self.file = open(self.path, 'a', encoding='utf-8')
+
+    def __contains__(self, slide_index):
+        return slide_index in self.transcripts
+
+    def __len__(self):
+        return len(self.transcripts)
+
+    def get(self, slide_index):
+        return self.transcripts.get(slide_index)
+
+    # Save a finished slide, flushed to disk right away so it survives a crash
+    def record(self, slide_index, transcript):
+        with self.lock:
+            self.transcripts[slide_index] = transcript
+            self.file.write(json.dumps({"slide": slide_index, "transcript": transcript}, ensure_ascii=False) + "\n")
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+    # Delete the journal once the run is complete
+    def remove(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
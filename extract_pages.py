@@ -1,8 +1,9 @@
 import sys
 import os
-import shutil
-from tempfile import mkdtemp
 import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QListWidget, QListWidgetItem,
@@ -10,55 +11,168 @@ from PyQt5.QtWidgets import (
     QProgressBar, QLabel, QStyle, QSizePolicy, QSpacerItem, QLineEdit
 )
 from PyQt5.QtGui import QIcon, QFont, QPixmap, QColor, QPalette
-from PyQt5.QtCore import QSize, Qt, QThread, pyqtSignal
+from PyQt5.QtCore import QSize, Qt, QThread, QTimer, pyqtSignal
 
 import PyPDF2
-from pdf2image import convert_from_path
+
+from pdf_document import PDFDocument
+from thumbnail_cache import ThumbnailCache
+
+THUMBNAIL_DPI = 100
+RENDER_WORKERS = os.cpu_count() or 1  # Number of pdftoppm processes running at the same time
+MAX_RENDER_CHUNK = 16  # Maximum number of pages rendered by a single pdftoppm call
+
+LAZY_THUMBNAILS = True  # Show placeholders right away and only render the pages scrolled into view
+THUMBNAIL_LOOKAHEAD = 12  # Pages rendered ahead of and behind the visible ones
+PIXMAP_CACHE_SIZE = 150  # Maximum number of thumbnails kept in memory
+
+# Render the pages [first_page, last_page) with a single pdftoppm call, writing the PNGs directly to the thumbnail cache
+def render_thumbnails(document, thumbnail_cache, first_page, last_page):
+    file_hash = document.content_hash
+    image_paths = document.render_to_files(
+        first_page, last_page, thumbnail_cache.page_dir(file_hash, THUMBNAIL_DPI),
+        f"render_{first_page}_", THUMBNAIL_DPI
+    )
+    return [
+        (i, thumbnail_cache.put(file_hash, THUMBNAIL_DPI, i, image_path))
+        for i, image_path in zip(range(first_page, last_page), image_paths)
+    ]
 
 class PDFLoaderThread(QThread):
     progress = pyqtSignal(int)
-    finished = pyqtSignal(list, PyPDF2.PdfReader, object)
+    page_count = pyqtSignal(int)
+    page_ready = pyqtSignal(int, str)
+    finished = pyqtSignal(list, object)
     error = pyqtSignal(str)
 
-    def __init__(self, pdf_path, temp_dir):
+    def __init__(self, pdf_path, thumbnail_cache):
         super().__init__()
         self.pdf_path = pdf_path
-        self.temp_dir = temp_dir
+        self.thumbnail_cache = thumbnail_cache
 
     def run(self):
         try:
-            file = open(self.pdf_path, 'rb')
-            pdf_reader = PyPDF2.PdfReader(file)
-            num_pages = len(pdf_reader.pages)
+            document = PDFDocument(self.pdf_path)
+            num_pages = document.num_pages
+            self.page_count.emit(num_pages)
+
+            file_hash = document.content_hash
+            self.thumbnail_cache.evict(keep_hash=file_hash)
 
-            # Convert PDF pages to images one by one
+            # Reuse the thumbnails rendered in previous sessions
             page_images = []
+            missing_pages = []
             for i in range(num_pages):
-                images = convert_from_path(
-                    self.pdf_path, first_page=i+1, last_page=i+1, dpi=100
-                )
-                image = images[0]
-                image_path = os.path.join(self.temp_dir, f"temp_page_{i}.png")
-                image.save(image_path, 'PNG')
-                page_images.append((i, image_path))
-
-                # Emit progress
-                self.progress.emit(int((i + 1) / num_pages * 100))
+                image_path = self.thumbnail_cache.get(file_hash, THUMBNAIL_DPI, i)
+                if image_path:
+                    page_images.append((i, image_path))
+                    self.page_ready.emit(i, image_path)
+                else:
+                    missing_pages.append(i)
+
+            if num_pages:
+                self.progress.emit(int(len(page_images) / num_pages * 100))
+
+            # Split the missing pages in runs of consecutive pages, small enough that every core gets a few of them
+            # and thumbnails keep coming in while the rest is rendered
+            chunk_size = max(1, min(MAX_RENDER_CHUNK, -(-len(missing_pages) // (RENDER_WORKERS * 2))))
+            chunks = []
+            for i in missing_pages:
+                if chunks and chunks[-1][1] == i and chunks[-1][1] - chunks[-1][0] < chunk_size:
+                    chunks[-1][1] = i + 1
+                else:
+                    chunks.append([i, i + 1])
+
+            with ThreadPoolExecutor(max_workers=RENDER_WORKERS) as executor:
+                futures = [
+                    executor.submit(render_thumbnails, document, self.thumbnail_cache, first_page, last_page)
+                    for first_page, last_page in chunks
+                ]
+                for future in as_completed(futures):
+                    for i, image_path in future.result():
+                        page_images.append((i, image_path))
+                        self.page_ready.emit(i, image_path)
+
+                    # Emit progress
+                    self.progress.emit(int(len(page_images) / num_pages * 100))
+
+            page_images.sort()
+            self.finished.emit(page_images, document)
 
-            self.finished.emit(page_images, pdf_reader, file)
+        except Exception as e:
+            self.error.emit(str(e))
 
+# Long-lived thread rendering the thumbnails requested by the page list, most urgent first
+class ThumbnailRenderThread(QThread):
+    thumbnail_ready = pyqtSignal(int, str)
+    error = pyqtSignal(str)
+
+    def __init__(self, document, thumbnail_cache):
+        super().__init__()
+        self.document = document
+        self.thumbnail_cache = thumbnail_cache
+        self.file_hash = None
+        self.pending = []
+        self.condition = threading.Condition()
+        self.running = True
+
+    # Replace the pending requests, the pages scrolled out of view are no longer needed
+    def request(self, pages):
+        with self.condition:
+            self.pending = list(pages)
+            self.condition.notify()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+
+    def run(self):
+        try:
+            self.file_hash = self.document.content_hash
+            self.thumbnail_cache.evict(keep_hash=self.file_hash)
         except Exception as e:
             self.error.emit(str(e))
+            return
+
+        while True:
+            with self.condition:
+                while self.running and not self.pending:
+                    self.condition.wait()
+                if not self.running:
+                    return
+
+                first_page = self.pending.pop(0)
+
+            # Thumbnails rendered in a previous session are served from the cache
+            image_path = self.thumbnail_cache.get(self.file_hash, THUMBNAIL_DPI, first_page)
+            if image_path:
+                self.thumbnail_ready.emit(first_page, image_path)
+                continue
+
+            # Render the consecutive pending pages together with a single pdftoppm call
+            with self.condition:
+                last_page = first_page + 1
+                while last_page in self.pending and last_page - first_page < MAX_RENDER_CHUNK \
+                        and not self.thumbnail_cache.get(self.file_hash, THUMBNAIL_DPI, last_page):
+                    self.pending.remove(last_page)
+                    last_page += 1
+
+            try:
+                for i, image_path in render_thumbnails(self.document, self.thumbnail_cache, first_page, last_page):
+                    self.thumbnail_ready.emit(i, image_path)
+            except Exception as e:
+                self.error.emit(str(e))
 
 class PDFSaverThread(QThread):
     progress = pyqtSignal(int)
     finished = pyqtSignal()
     error = pyqtSignal(str)
 
-    def __init__(self, save_path, pdf_reader, selected_pages):
+    def __init__(self, save_path, document, selected_pages):
         super().__init__()
         self.save_path = save_path
-        self.pdf_reader = pdf_reader
+        self.document = document
         self.selected_pages = selected_pages
 
     def run(self):
@@ -66,7 +180,7 @@ class PDFSaverThread(QThread):
             writer = PyPDF2.PdfWriter()
             num_pages = len(self.selected_pages)
             for i, page_index in enumerate(self.selected_pages):
-                writer.add_page(self.pdf_reader.pages[page_index])
+                writer.add_page(self.document.page(page_index))
                 self.progress.emit(int((i + 1) / num_pages * 100))
 
             with open(self.save_path, 'wb') as f:
@@ -84,15 +198,23 @@ class PDFPageSelector(QMainWindow):
         self.setMinimumSize(1200, 800)
 
         self.pdf_path = None
-        self.pdf_file = None
-        self.pdf_reader = None
+        self.document = None  # The open PDF, shared by the thumbnails rendering and the saving
         self.page_images = []
         self.current_pages = []
-        self.temp_dir = mkdtemp()
+        self.thumbnail_cache = ThumbnailCache()
         self.selected_pages = []  # Keep track of selected pages
 
+        # Lazy thumbnails: rendered images in the thumbnail cache, LRU cache of the loaded ones and the items showing each page
+        self.render_thread = None
+        self.thumbnail_paths = {}
+        self.pixmap_cache = OrderedDict()
+        self.page_items = {}
+
         # Initialize thumbnail size
         self.thumbnail_size = QSize(200, 260)
+        placeholder = QPixmap(self.thumbnail_size)
+        placeholder.fill(QColor(80, 83, 84))
+        self.placeholder_icon = QIcon(placeholder)
         self.min_thumbnail_size = QSize(100, 130)
         self.max_thumbnail_size = QSize(400, 520)
         self.zoom_step = 20  # Pixels to increase/decrease
@@ -286,6 +408,14 @@ class PDFPageSelector(QMainWindow):
             }
         """)
 
+        # Request the thumbnails of the visible pages when scrolling or resizing (debounced)
+        self.visible_pages_timer = QTimer(self)
+        self.visible_pages_timer.setSingleShot(True)
+        self.visible_pages_timer.setInterval(50)
+        self.visible_pages_timer.timeout.connect(self.request_visible_thumbnails)
+        self.page_list_widget.verticalScrollBar().valueChanged.connect(self.schedule_visible_thumbnails)
+        self.page_list_widget.verticalScrollBar().rangeChanged.connect(self.schedule_visible_thumbnails)
+
         # Assemble main layout
         main_layout.addLayout(top_layout)
         main_layout.addLayout(middle_layout)
@@ -307,18 +437,24 @@ class PDFPageSelector(QMainWindow):
 
     def load_pdf(self):
         # close old file if open
-        if self.pdf_file:
-            self.pdf_file.close()
+        # Stop rendering the thumbnails of the previous file
+        self.stop_render_thread()
+        if self.document:
+            self.document.close()
+            self.document = None
 
         # Clear previous data
         self.page_list_widget.clear()
         self.page_images = []
         self.current_pages = []
         self.selected_pages = []
+        self.thumbnail_paths = {}
+        self.pixmap_cache = OrderedDict()
+        self.page_items = {}
 
-        # Clean up previous temp images
-        shutil.rmtree(self.temp_dir)
-        self.temp_dir = mkdtemp()
+        if LAZY_THUMBNAILS:
+            self.load_pdf_lazily()
+            return
 
         # Show progress bar and status
         self.progress_bar.setValue(0)
@@ -330,25 +466,160 @@ class PDFPageSelector(QMainWindow):
         self.set_all_buttons_enabled(False)
 
         # Start loader thread
-        self.loader_thread = PDFLoaderThread(self.pdf_path, self.temp_dir)
+        self.loader_thread = PDFLoaderThread(self.pdf_path, self.thumbnail_cache)
         self.loader_thread.progress.connect(self.progress_bar.setValue)
+        self.loader_thread.page_count.connect(self.add_page_placeholders)
+        self.loader_thread.page_ready.connect(self.page_loaded)
         self.loader_thread.finished.connect(self.load_pdf_finished)
         self.loader_thread.error.connect(self.load_pdf_error)
         self.loader_thread.start()
 
-    def load_pdf_finished(self, page_images, pdf_reader, pdf_file):
-        self.pdf_file = pdf_file
-        self.pdf_reader = pdf_reader
-        self.page_images = page_images
-        for i, image_path in page_images:
-            # Create QListWidgetItem with the image
-            item = QListWidgetItem(f"Page {i+1}")
-            icon = QIcon(image_path)
-            item.setIcon(icon)
-            item.setTextAlignment(Qt.AlignCenter)
-            self.page_list_widget.addItem(item)
+    # Show a placeholder for every page right away, thumbnails are rendered when their page becomes visible
+    def load_pdf_lazily(self):
+        try:
+            self.document = PDFDocument(self.pdf_path)
+            num_pages = self.document.num_pages
+        except Exception as e:
+            self.load_pdf_error(str(e))
+            return
+
+        self.page_images = [(i, None) for i in range(num_pages)]
+        for i in range(num_pages):
+            self.page_list_widget.addItem(self.create_page_item(i))
             self.current_pages.append(i)
 
+        self.render_thread = ThumbnailRenderThread(self.document, self.thumbnail_cache)
+        self.render_thread.thumbnail_ready.connect(self.thumbnail_ready)
+        self.render_thread.error.connect(self.load_pdf_error)
+        self.render_thread.start()
+        self.schedule_visible_thumbnails()
+
+    def stop_render_thread(self):
+        if self.render_thread is not None:
+            self.render_thread.stop()
+            self.render_thread.wait()
+            self.render_thread = None
+
+    # Create the list item showing a page, with its thumbnail if available
+    def create_page_item(self, page_index):
+        item = QListWidgetItem(f"Page {page_index + 1}")
+        item.setData(Qt.UserRole, page_index)
+        item.setIcon(self.thumbnail_icon(page_index))
+        item.setTextAlignment(Qt.AlignCenter)
+        self.page_items[page_index] = item
+        return item
+
+    def thumbnail_icon(self, page_index):
+        if not LAZY_THUMBNAILS:
+            image_path = self.page_images[page_index][1]
+            return QIcon(image_path) if image_path else self.placeholder_icon
+
+        if page_index in self.pixmap_cache:
+            self.pixmap_cache.move_to_end(page_index)
+            return self.pixmap_cache[page_index]
+        if page_index in self.thumbnail_paths:
+            return self.cache_thumbnail(page_index, self.thumbnail_paths[page_index])
+        return self.placeholder_icon
+
+    # Load a rendered thumbnail in the LRU cache, the evicted pages go back to the placeholder
+    def cache_thumbnail(self, page_index, image_path):
+        icon = QIcon(QPixmap(image_path))
+        self.pixmap_cache[page_index] = icon
+        self.pixmap_cache.move_to_end(page_index)
+        while len(self.pixmap_cache) > PIXMAP_CACHE_SIZE:
+            evicted_page, _ = self.pixmap_cache.popitem(last=False)
+            evicted_item = self.page_items.get(evicted_page)
+            if evicted_item is not None:
+                evicted_item.setIcon(self.placeholder_icon)
+        return icon
+
+    def thumbnail_ready(self, page_index, image_path):
+        # Ignore the thumbnails of a previously opened file
+        if self.sender() is not self.render_thread:
+            return
+
+        self.thumbnail_paths[page_index] = image_path
+        self.page_images[page_index] = (page_index, image_path)
+        item = self.page_items.get(page_index)
+        if item is not None:
+            item.setIcon(self.cache_thumbnail(page_index, image_path))
+
+    def schedule_visible_thumbnails(self, *args):
+        if LAZY_THUMBNAILS and self.render_thread is not None:
+            self.visible_pages_timer.start()
+
+    # Find the rows shown in the viewport from the geometry of the items (the corners of the viewport usually fall
+    # in the spacing between items). The items are laid out in list order, line after line, so the first item
+    # ending below the top of the viewport and the first one starting below its bottom are found by bisection.
+    # Returns (first_row, last_row), with last_row = first_row - 1 when no item is visible.
+    def visible_row_range(self):
+        widget = self.page_list_widget
+        viewport = widget.viewport().rect()
+
+        def first_row_where(condition):
+            low, high = 0, widget.count()
+            while low < high:
+                middle = (low + high) // 2
+                if condition(widget.visualItemRect(widget.item(middle))):
+                    high = middle
+                else:
+                    low = middle + 1
+            return low
+
+        first_row = first_row_where(lambda rect: rect.bottom() >= viewport.top())
+        end_row = first_row_where(lambda rect: rect.top() > viewport.bottom())
+        return first_row, end_row - 1
+
+    # Find the pages shown in the viewport (plus the lookahead) and load or render their thumbnails
+    def request_visible_thumbnails(self):
+        count = self.page_list_widget.count()
+        if self.render_thread is None or count == 0:
+            return
+
+        first_row, last_row = self.visible_row_range()
+
+        visible_rows = range(first_row, last_row + 1)
+        lookahead_rows = list(range(last_row + 1, min(count, last_row + 1 + THUMBNAIL_LOOKAHEAD))) + \
+            list(range(max(0, first_row - THUMBNAIL_LOOKAHEAD), first_row))
+
+        to_render = []
+        for row in list(visible_rows) + lookahead_rows:
+            item = self.page_list_widget.item(row)
+            page_index = item.data(Qt.UserRole)
+            if page_index in self.pixmap_cache:
+                self.pixmap_cache.move_to_end(page_index)
+            elif page_index in self.thumbnail_paths:
+                item.setIcon(self.cache_thumbnail(page_index, self.thumbnail_paths[page_index]))
+            else:
+                to_render.append(page_index)
+
+        self.render_thread.request(to_render)
+
+    # Show a placeholder for every page as soon as the page count is known, the thumbnails replace them as they are loaded
+    def add_page_placeholders(self, num_pages):
+        if self.sender() is not self.loader_thread:
+            return
+        self.page_images = [(i, None) for i in range(num_pages)]
+        for i in range(num_pages):
+            self.page_list_widget.addItem(self.create_page_item(i))
+            self.current_pages.append(i)
+
+    def page_loaded(self, page_index, image_path):
+        # Ignore the pages of a previously opened file
+        if self.sender() is not self.loader_thread:
+            return
+        self.page_images[page_index] = (page_index, image_path)
+        item = self.page_items.get(page_index)
+        if item is not None:
+            item.setIcon(QIcon(image_path))
+
+    def load_pdf_finished(self, page_images, document):
+        if self.sender() is not self.loader_thread:
+            document.close()
+            return
+        self.document = document
+        self.page_images = page_images
+
         # Restore previous selections
         for page_index in self.selected_pages:
             item = self.page_list_widget.item(page_index)
@@ -382,7 +653,8 @@ class PDFPageSelector(QMainWindow):
             reverse=True
         )
         for row in selected_rows:
-            self.page_list_widget.takeItem(row)
+            item = self.page_list_widget.takeItem(row)
+            self.page_items.pop(item.data(Qt.UserRole), None)
             del self.current_pages[row]
             self.selected_pages = [p for p in self.selected_pages if p != row]
 
@@ -410,7 +682,7 @@ class PDFPageSelector(QMainWindow):
             self.set_all_buttons_enabled(False)
 
             # Start saver thread
-            self.saver_thread = PDFSaverThread(save_path, self.pdf_reader, self.selected_pages)
+            self.saver_thread = PDFSaverThread(save_path, self.document, self.selected_pages)
             self.saver_thread.progress.connect(self.progress_bar.setValue)
             self.saver_thread.finished.connect(self.save_pdf_finished)
             self.saver_thread.error.connect(self.save_pdf_error)
@@ -448,6 +720,7 @@ class PDFPageSelector(QMainWindow):
             )
             self.page_list_widget.setIconSize(self.thumbnail_size)
             self.update_zoom_buttons()
+            self.schedule_visible_thumbnails()
 
     def zoom_out(self):
         if self.thumbnail_size.width() - self.zoom_step >= self.min_thumbnail_size.width() and \
@@ -458,6 +731,7 @@ class PDFPageSelector(QMainWindow):
             )
             self.page_list_widget.setIconSize(self.thumbnail_size)
             self.update_zoom_buttons()
+            self.schedule_visible_thumbnails()
 
     def update_zoom_buttons(self):
         # Enable or disable zoom buttons based on current thumbnail size
@@ -502,7 +776,7 @@ class PDFPageSelector(QMainWindow):
             return
 
         # Check if selected pages are within the document
-        total_pages = len(self.pdf_reader.pages)
+        total_pages = self.document.num_pages
         for page in selected_pages:
             if page < 0 or page >= total_pages:
                 QMessageBox.critical(self, "Invalid Page Number", f"Page {page + 1} is out of range.")
@@ -528,13 +802,10 @@ class PDFPageSelector(QMainWindow):
             return
 
         self.page_list_widget.clear()
+        self.page_items = {}
         for page_index in self.selected_pages:
-            image_path = self.page_images[page_index][1]
-            item = QListWidgetItem(f"Page {page_index + 1}")
-            icon = QIcon(image_path)
-            item.setIcon(icon)
-            item.setTextAlignment(Qt.AlignCenter)
-            self.page_list_widget.addItem(item)
+            self.page_list_widget.addItem(self.create_page_item(page_index))
+        self.schedule_visible_thumbnails()
 
         QMessageBox.information(self, "Show Selected Pages", f"Showing {len(self.selected_pages)} selected pages.")
 
@@ -543,12 +814,10 @@ class PDFPageSelector(QMainWindow):
             return
 
         self.page_list_widget.clear()
+        self.page_items = {}
         for i, image_path in self.page_images:
-            item = QListWidgetItem(f"Page {i + 1}")
-            icon = QIcon(image_path)
-            item.setIcon(icon)
-            item.setTextAlignment(Qt.AlignCenter)
-            self.page_list_widget.addItem(item)
+            self.page_list_widget.addItem(self.create_page_item(i))
+        self.schedule_visible_thumbnails()
 
         # Restore previous selections
         for page_index in self.selected_pages:
@@ -595,11 +864,9 @@ class PDFPageSelector(QMainWindow):
         return page_indices
 
     def closeEvent(self, event):
-        try:
-            # Clean up temporary directory
-            shutil.rmtree(self.temp_dir)
-        except Exception as e:
-            print(f"Error while cleaning up temporary files: {e}")
+        self.stop_render_thread()
+        if self.document:
+            self.document.close()
         event.accept()
 
 if __name__ == "__main__":
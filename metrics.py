@@ -0,0 +1,131 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+# Configuration
+RUN_REPORT_DIR = os.getenv("RUN_REPORT_DIR", "")  # Directory for the JSON report of every run (empty = no report)
+
+# Function to compute a percentile of a list of values, interpolating between the closest ones
+def percentile(values, fraction):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+# Timings and counters of a run, per stage and per slide.
+# Stages are measured with span(); a span covering several slides (e.g. a chunk of rendered pages) is split evenly between them.
+# Every measure is also passed to the optional callback as a dict, e.g. {"type": "span", "stage": "render", "slide": 3, "seconds": 0.12}.
+# Safe to use from several threads.
+class RunMetrics:
+    def __init__(self, total_slides=0, callback=None):
+        self.total_slides = total_slides
+        self.callback = callback
+        self.start = time.perf_counter()
+        self.end = None
+        self.stages = {}  # stage -> list of durations in seconds
+        self.counters = {}  # name -> total
+        self.slides = {}  # slide index -> {"stage_seconds": ..., counters...}
+        self.completed = 0  # Slides done, including the ones resumed or skipped
+        self.transcribed = 0  # Slides sent to the API
+        self.lock = threading.Lock()
+
+    def emit(self, event):
+        if self.callback:
+            self.callback(event)
+
+    def slide_entry(self, slide):
+        return self.slides.setdefault(slide, {})
+
+    # Measures of a single slide
+    def slide(self, slide):
+        with self.lock:
+            return dict(self.slides.get(slide, {}))
+
+    # Record the duration of a stage, split between the given slides
+    def add_span(self, stage, seconds, slides=()):
+        slides = list(slides)
+        with self.lock:
+            self.stages.setdefault(stage, []).append(seconds)
+            for slide in slides:
+                entry = self.slide_entry(slide)
+                entry[f"{stage}_seconds"] = entry.get(f"{stage}_seconds", 0.0) + seconds / len(slides)
+        self.emit({"type": "span", "stage": stage, "slide": slides[0] if len(slides) == 1 else slides, "seconds": seconds})
+
+    @contextmanager
+    def span(self, stage, slides=()):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(stage, time.perf_counter() - start, slides)
+
+    def count(self, name, value=1, slide=None):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+            if slide is not None:
+                entry = self.slide_entry(slide)
+                entry[name] = entry.get(name, 0) + value
+        self.emit({"type": "count", "name": name, "slide": slide, "value": value})
+
+    # Mark a slide as done; transcribed is False for slides that did not need a request (resumed or skipped)
+    def slide_done(self, transcribed=True):
+        with self.lock:
+            self.completed += 1
+            if transcribed:
+                self.transcribed += 1
+
+    # Slides per minute sent to the API and estimated seconds left (None until the first slide is transcribed)
+    def throughput(self):
+        with self.lock:
+            elapsed = (self.end or time.perf_counter()) - self.start
+            rate = self.transcribed / elapsed * 60 if elapsed and self.transcribed else 0.0
+            remaining = max(0, self.total_slides - self.completed)
+        eta = remaining / rate * 60 if rate else None
+        return rate, eta
+
+    # Short progress line for the status bar, e.g. "12/40 slides, 8.5 slides/min, ETA 3:18"
+    def status_line(self):
+        rate, eta = self.throughput()
+        line = f"{self.completed}/{self.total_slides} slides, {rate:.1f} slides/min"
+        if eta is not None:
+            line += f", ETA {int(eta // 60)}:{int(eta % 60):02d}"
+        return line
+
+    def finish(self):
+        self.end = time.perf_counter()
+
+    # Summary of the run: wall time, throughput, statistics of every stage, counters and per-slide details
+    def report(self):
+        rate, _ = self.throughput()
+        with self.lock:
+            stages = {
+                stage: {
+                    "count": len(durations),
+                    "total_seconds": round(sum(durations), 4),
+                    "mean_seconds": round(sum(durations) / len(durations), 4),
+                    "p50_seconds": round(percentile(durations, 0.5), 4),
+                    "p95_seconds": round(percentile(durations, 0.95), 4),
+                    "max_seconds": round(max(durations), 4)
+                }
+                for stage, durations in self.stages.items()
+            }
+            return {
+                "wall_seconds": round((self.end or time.perf_counter()) - self.start, 3),
+                "total_slides": self.total_slides,
+                "completed_slides": self.completed,
+                "transcribed_slides": self.transcribed,
+                "slides_per_minute": round(rate, 2),
+                "stages": stages,
+                "counters": dict(self.counters),
+                "slides": {str(slide): dict(entry) for slide, entry in sorted(self.slides.items())}
+            }
+
+    def save(self, path, **extra):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({**extra, **self.report()}, f, indent=2)
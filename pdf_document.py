@@ -0,0 +1,88 @@
+import mmap
+import hashlib
+import threading
+from collections import OrderedDict
+
+RENDER_CACHE_SIZE = 8  # Maximum number of rendered pages kept in memory by a document
+
+# A PDF opened once and shared by the text extraction, the page selection and the rendering.
+# The file is memory-mapped and parsed a single time; texts and rendered pages are produced lazily and cached.
+# The PdfReader is not thread safe, so every access to it goes through self.lock.
+class PDFDocument:
+    def __init__(self, path):
+        import PyPDF2
+
+        self.path = path
+        self.lock = threading.RLock()
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.reader = PyPDF2.PdfReader(self.data)
+        self.num_pages = len(self.reader.pages)
+        self.texts = {}
+        self.rendered = OrderedDict()
+        self._content_hash = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self.num_pages
+
+    # SHA-256 of the file content, computed from the mapped file on first use
+    @property
+    def content_hash(self):
+        with self.lock:
+            if self._content_hash is None:
+                self._content_hash = hashlib.sha256(self.data).hexdigest()
+            return self._content_hash
+
+    def page(self, page_index):
+        with self.lock:
+            return self.reader.pages[page_index]
+
+    # Text of a page (0-based), extracted once
+    def text(self, page_index):
+        with self.lock:
+            if page_index not in self.texts:
+                self.texts[page_index] = self.reader.pages[page_index].extract_text() or ""
+            return self.texts[page_index]
+
+    # Render the pages [first_page, last_page) with a single pdftoppm call (pdf2image keyword arguments, e.g. dpi or size).
+    # The last RENDER_CACHE_SIZE rendered pages are kept, so asking again for the same pages does not render them again.
+    def render(self, first_page, last_page, **kwargs):
+        from pdf2image import convert_from_path
+
+        options = tuple(sorted(kwargs.items()))
+        with self.lock:
+            cached = [self.rendered.get((i, options)) for i in range(first_page, last_page)]
+        if all(image is not None for image in cached):
+            return cached
+
+        images = convert_from_path(self.path, first_page=first_page + 1, last_page=last_page, **kwargs)
+        with self.lock:
+            for i, image in zip(range(first_page, last_page), images):
+                self.rendered[(i, options)] = image
+                self.rendered.move_to_end((i, options))
+            while len(self.rendered) > RENDER_CACHE_SIZE:
+                self.rendered.popitem(last=False)
+        return images
+
+    # Render the pages [first_page, last_page) directly to image files, returning their paths
+    def render_to_files(self, first_page, last_page, output_folder, output_file, dpi, fmt='png'):
+        from pdf2image import convert_from_path
+
+        return convert_from_path(
+            self.path, first_page=first_page + 1, last_page=last_page, dpi=dpi,
+            fmt=fmt, output_folder=output_folder, output_file=output_file, paths_only=True
+        )
+
+    def close(self):
+        with self.lock:
+            self.rendered.clear()
+            self.reader = None
+            if not self.data.closed:
+                self.data.close()
+            self.file.close()
@@ -0,0 +1,149 @@
+import os
+
+# Configuration
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))  # Tokens for the slide text and the context of each request (0 = no limit)
+MIN_CONTEXT_TOKENS = 40  # Shortened context transcripts below this size are dropped
+TRUNCATION_MARK = " [...]"
+
+# Static part of the prompt: instructions and few-shot example.
+# It is sent as the first message and never changes between slides or runs, so that providers caching
+# identical prompt prefixes can reuse it; anything varying (image, slide text, context) goes after it.
+FEW_SHOT_EXAMPLE = """
+### Concepts Representation (1)
+
+A concept can be represented in multiple ways. Primarily, a concept is shaped by a **word** or a combination of terms. Examples include "car," "person," or "electric engine." These words serve as the basic building blocks of the concept.
+
+Additionally, a concept is defined by a **gloss**—a textual description that provides clarification and examples to ensure proper interpretation. The gloss helps disambiguate the meaning of the concept and offers context.
+
+Concepts are also linked semantically to other concepts. This is done through two main relationships:
+- **Hyponymy**, where a concept is related to a more generic term (e.g., "woman" is a more general concept than "daughter").
+- **Hypernymy**, where a concept is related to a more specific term (e.g., "artificial lake" is a more specific concept than "lake"). 
+
+These relationships help form a structured network of concepts that enable deeper understanding and categorization of information.
+
+---
+
+### Boids
+
+The concept of **Boids** represents a foundational example of **Computational Swarm Intelligence**, illustrating how simple agents can simulate the flocking behavior of birds. These agents, referred to as "boids" (short for "bird-oid objects"), operate under the assumption that each boid perceives the angle and distance of its neighboring boids, as proposed by Reynolds in 1986.
+
+Boids adhere to three fundamental rules that enable them to exhibit complex behaviors:
+
+1. **Separation**: Each boid maintains a specified distance from its neighboring boids to avoid crowding and collisions. This rule ensures that the boids do not cluster too closely together, which could lead to chaos.
+
+2. **Cohesion**: A boid moves towards the center of mass of its neighboring boids. This rule promotes group unity, encouraging boids to stay together as a cohesive flock.
+
+3. **Alignment**: A boid aligns its direction and angle with those of its neighboring boids. This rule allows for synchronized movement, contributing to the overall fluidity of the flock's motion.
+
+This model exemplifies how complex behaviors can emerge from straightforward rules, highlighting the principles of swarm intelligence in action.
+"""
+
+SYSTEM_PROMPT = f"""You generate the notes of lecture slides. For each slide you receive its image and its partially extracted text, and you write its notes with the following structure: the slide title, followed by its content rewritten to be readable and explain everything, ending with "---".
+
+IMPORTANT: you should only respond with the provided format, do not add any additional information, directly output the requested content. You should also avoid to repeat information between multiple slides.
+
+Here is an output example of the expected format:
+```
+{FEW_SHOT_EXAMPLE}
+```
+"""
+
+TEXT_CONTEXT_INTRO = "Here is the extracted text from some of the previous slides to use as additional context, you should NOT explain it again, reference it if needed to do so:"
+TRANSCRIPT_CONTEXT_INTRO = "Here are the transcripts from some of the previous slides to use as additional context, you should NOT repeat information in here, reference them if needed to do so:"
+
+# Tokenizers by model name, None when tiktoken is not installed
+_encodings = {}
+
+def get_encoding(model_name):
+    if model_name not in _encodings:
+        try:
+            import tiktoken
+        except ImportError:
+            _encodings[model_name] = None
+        else:
+            try:
+                _encodings[model_name] = tiktoken.encoding_for_model(model_name)
+            except KeyError:
+                _encodings[model_name] = tiktoken.get_encoding("o200k_base")
+    return _encodings[model_name]
+
+# Function to count the tokens of a text, approximated as 4 characters per token without tiktoken
+def count_tokens(text, model_name=None):
+    encoding = get_encoding(model_name)
+    if encoding is None:
+        return -(-len(text) // 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+# Function to cut a text to at most max_tokens tokens, marking where it was cut
+def truncate_to_tokens(text, max_tokens, model_name=None):
+    if count_tokens(text, model_name) <= max_tokens:
+        return text
+    max_tokens = max(0, max_tokens - count_tokens(TRUNCATION_MARK, model_name))
+    encoding = get_encoding(model_name)
+    if encoding is None:
+        return text[:max_tokens * 4].rstrip() + TRUNCATION_MARK
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens]).rstrip() + TRUNCATION_MARK
+
+# Function to fit the context to a token budget.
+# The most recent slides are kept first; the first one not fitting anymore is shortened to the remaining budget
+# (its title and opening lines), and the older ones are dropped.
+def fit_context(context, budget, model_name=None):
+    fitted = []
+    for entry in reversed(context):
+        tokens = count_tokens(entry, model_name)
+        if tokens > budget:
+            if budget >= MIN_CONTEXT_TOKENS:
+                fitted.append(truncate_to_tokens(entry, budget, model_name))
+            break
+        fitted.append(entry)
+        budget -= tokens
+    return fitted[::-1]
+
+# Function to build the messages for a slide: the static system prompt, then the slide image and the variable text.
+# With a budget, the slide text takes at most half of it and the context the rest.
+def build_messages(slide_text, context=(), context_from_text=False, image=None, image_detail="auto", model_name=None, budget=PROMPT_TOKEN_BUDGET):
+    if budget:
+        slide_text = truncate_to_tokens(slide_text, budget // 2, model_name)
+        context = fit_context(list(context), budget - count_tokens(slide_text, model_name), model_name)
+
+    context_intro = TEXT_CONTEXT_INTRO if context_from_text else TRANSCRIPT_CONTEXT_INTRO
+    context_text = "\n\n---\n".join(context)
+    prompt = f"""Please generate the notes for the slide above.
+
+Here is the partially extracted text from the slide, you should use this information together with the provided image to generate the notes:
+```
+{slide_text}
+```
+{context_intro}
+```
+{context_text}
+```
+"""
+
+    # Attach the slide image before the instructions, which refer to "the slide above"
+    content = prompt
+    if image:
+        content = [
+            {
+                "type": "image_url",
+                "image_url": {
+                    "url": f"data:image/jpeg;base64,{image}",
+                    "detail": image_detail
+                }
+            },
+            {
+                "type": "text",
+                "text": prompt
+            }
+        ]
+
+    return [
+        {
+            "role": "system",
+            "content": SYSTEM_PROMPT
+        },
+        {
+            "role": "user",
+            "content": content
+        }
+    ]
@@ -0,0 +1,88 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Configuration
+CACHE_FILE = os.getenv("CACHE_FILE", "transcript_cache.sqlite")  # SQLite file holding the cached responses
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(256 * 1024 * 1024)))  # Size cap before LRU eviction
+
+# Persistent, content-addressed cache for the model responses.
+# Entries are keyed by a hash of the endpoint and the full request payload (model name, prompt, images,
+# temperature, max_tokens, ...), so changing any of them results in a new request.
+class ResponseCache:
+    def __init__(self, path=CACHE_FILE, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        # The cache is shared by the worker threads, access is serialized through self.lock
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self.connection.commit()
+
+    # Function to compute the cache key of a request
+    @staticmethod
+    def make_key(api_endpoint, payload):
+        canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        digest = hashlib.sha256()
+        digest.update(api_endpoint.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(canonical.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.connection.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.connection.commit()
+            return row[0]
+
+    def put(self, key, value):
+        size = len(value.encode("utf-8"))
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time())
+            )
+            self.evict()
+            self.connection.commit()
+
+    # Remove the least recently used entries until the cache fits in max_bytes (called with the lock held)
+    def evict(self):
+        total_size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total_size <= self.max_bytes:
+            return
+
+        to_delete = []
+        for key, size in self.connection.execute("SELECT key, size FROM responses ORDER BY last_access"):
+            if total_size <= self.max_bytes:
+                break
+            to_delete.append((key,))
+            total_size -= size
+        self.connection.executemany("DELETE FROM responses WHERE key = ?", to_delete)
+
+    def clear(self):
+        with self.lock:
+            self.connection.execute("DELETE FROM responses")
+            self.connection.commit()
+
+    def stats(self):
+        return f"{self.hits} hits, {self.misses} misses"
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,222 @@
+import os
+import re
+import time
+import random
+import threading
+
+import api_client
+from prompt_builder import count_tokens
+
+# Configuration
+REQUESTS_PER_MINUTE = int(os.getenv("REQUESTS_PER_MINUTE", "500"))  # Request quota (0 = only follow the rate-limit headers)
+TOKENS_PER_MINUTE = int(os.getenv("TOKENS_PER_MINUTE", "200000"))  # Token quota (0 = only follow the rate-limit headers)
+MAX_RETRIES = int(os.getenv("MAX_RETRIES", "6"))  # Retries for rate-limited, failed or timed out requests
+BACKOFF_BASE = 1.0  # Seconds before the first retry, doubled at each attempt
+BACKOFF_MAX = 60.0  # Maximum seconds between two attempts
+
+# Rough token cost of an image, used to estimate the tokens of a request before sending it
+IMAGE_TOKENS = {"low": 85, "high": 1105, "auto": 1105}
+
+# Function to parse the reset durations of the rate-limit headers (e.g. "1s", "6m0s", "20ms") to seconds
+def parse_duration(value):
+    seconds = 0.0
+    for amount, unit in re.findall(r"([\d.]+)(ms|s|m|h)", value or ""):
+        seconds += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return seconds
+
+# Function to estimate the tokens used by a chat completions request (prompt + maximum completion)
+def estimate_tokens(payload):
+    tokens = payload.get("max_tokens", 0)
+    for message in payload.get("messages", []):
+        content = message["content"]
+        if isinstance(content, str):
+            content = [{"type": "text", "text": content}]
+        for part in content:
+            if part["type"] == "text":
+                tokens += count_tokens(part["text"], payload.get("model"))
+            elif part["type"] == "image_url":
+                tokens += IMAGE_TOKENS.get(part["image_url"].get("detail", "auto"), IMAGE_TOKENS["auto"])
+    return tokens
+
+# Token bucket refilled continuously at capacity per minute
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    # Wait until `amount` tokens are available and take them (requests larger than the bucket wait for a full bucket)
+    def acquire(self, amount=1):
+        if not self.capacity:
+            return
+        amount = min(amount, self.capacity)
+        while True:
+            with self.lock:
+                self.refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait_time = (amount - self.tokens) * 60 / self.capacity
+            time.sleep(wait_time)
+
+    # Align the bucket with the quota reported by the server
+    def sync(self, limit, remaining, reset_seconds):
+        with self.lock:
+            if limit:
+                self.capacity = limit
+            if remaining is None or not self.capacity:
+                return
+            self.refill()
+            self.tokens = min(self.tokens, remaining)
+            # Nothing left: do not refill before the server resets the quota
+            if remaining <= 0 and reset_seconds:
+                self.tokens = -reset_seconds * self.capacity / 60
+
+# Concurrency limit adapted to the server: halved when rate limited, increased by one after `limit` successes in a row
+class AdaptiveConcurrency:
+    def __init__(self, maximum, minimum=1):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.limit = maximum
+        self.in_flight = 0
+        self.successes = 0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= self.limit:
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def on_success(self):
+        with self.condition:
+            self.successes += 1
+            if self.successes >= self.limit and self.limit < self.maximum:
+                self.limit += 1
+                self.successes = 0
+                self.condition.notify_all()
+
+    def on_throttled(self):
+        with self.condition:
+            self.limit = max(self.minimum, self.limit // 2)
+            self.successes = 0
+
+# Scheduler shared by all the requests of a run: paces them to the requests/min and tokens/min quotas,
+# limits the requests in flight and retries the failed ones with exponential backoff and jitter
+class RequestScheduler:
+    def __init__(self, max_concurrency=16, requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE, max_retries=MAX_RETRIES):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.max_retries = max_retries
+        self.retries = 0
+
+    def update_from_headers(self, headers):
+        def header(name, convert=int):
+            value = headers.get(name)
+            try:
+                return convert(value) if value is not None else None
+            except ValueError:
+                return None
+
+        self.requests.sync(
+            header("x-ratelimit-limit-requests"), header("x-ratelimit-remaining-requests"),
+            parse_duration(headers.get("x-ratelimit-reset-requests"))
+        )
+        self.tokens.sync(
+            header("x-ratelimit-limit-tokens"), header("x-ratelimit-remaining-tokens"),
+            parse_duration(headers.get("x-ratelimit-reset-tokens"))
+        )
+
+    def backoff(self, attempt, response=None):
+        # The server knows best when to retry
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    return float(retry_after) + random.uniform(0, 1)
+                except ValueError:
+                    pass
+        # Full jitter: spread the retries of concurrent requests
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+    # Release the concurrency slot of a request once its response is read: right away for a complete response,
+    # when the response is closed for a streamed one (the model is still generating while the body is read)
+    def release_when_read(self, response, stream):
+        if not stream:
+            self.concurrency.release()
+            return
+        close = response.close
+        released = False
+
+        def close_and_release():
+            nonlocal released
+            try:
+                close()
+            finally:
+                if not released:
+                    released = True
+                    self.concurrency.release()
+
+        response.close = close_and_release
+
+    # Send a chat completions request, returning the last response (or raising the last connection error).
+    # With stream=True the concurrency slot is held until the response is closed, so the caller must close it.
+    def post(self, url, payload, **kwargs):
+        import requests
+
+        estimated_tokens = estimate_tokens(payload)
+        for attempt in range(self.max_retries + 1):
+            self.concurrency.acquire()
+            self.requests.acquire()
+            self.tokens.acquire(estimated_tokens)
+            try:
+                response = api_client.post(url, json=payload, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.concurrency.release()
+                if attempt == self.max_retries:
+                    raise
+                response = None
+            except BaseException:
+                self.concurrency.release()
+                raise
+            else:
+                self.release_when_read(response, kwargs.get("stream", False))
+
+            if response is not None:
+                self.update_from_headers(response.headers)
+                if response.status_code == 429:
+                    self.concurrency.on_throttled()
+                elif response.status_code < 500:
+                    if response.status_code == 200:
+                        self.concurrency.on_success()
+                    return response
+                if attempt == self.max_retries:
+                    return response
+                # Give the connection back to the pool (the body of a streamed response is not read otherwise)
+                response.close()
+
+            self.retries += 1
+            time.sleep(self.backoff(attempt, response))
+
+# Scheduler used when none is given, shared by the whole process
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+def default_scheduler():
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = RequestScheduler()
+        return _default_scheduler
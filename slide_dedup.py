@@ -0,0 +1,127 @@
+import os
+from collections import deque
+from difflib import SequenceMatcher
+
+# Configuration
+DEDUP_SLIDES = os.getenv("DEDUP_SLIDES", "0") == "1"  # Skip near-duplicate slides instead of transcribing each of them
+DEDUP_MAX_DISTANCE = int(os.getenv("DEDUP_MAX_DISTANCE", "8"))  # Maximum differing bits (out of 64) between the image hashes
+DEDUP_TEXT_SIMILARITY = float(os.getenv("DEDUP_TEXT_SIMILARITY", "0.9"))  # Minimum similarity (0-1) of the extracted texts
+DEDUP_LOOKBACK = int(os.getenv("DEDUP_LOOKBACK", "100"))  # Number of earlier transcribed slides a slide can repeat
+HASH_SIZE = 8  # The difference hash has HASH_SIZE * HASH_SIZE bits
+
+# Function to compute the difference hash (dHash) of a rendered page: the page is shrunk to a tiny grayscale image
+# and each bit tells whether a pixel is brighter than its right neighbour, so it survives small edits and rescaling
+def dhash(page, hash_size=HASH_SIZE):
+    pixels = list(page.convert('L').resize((hash_size + 1, hash_size)).getdata())
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+def matched_characters(a, b):
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    return sum(block.size for block in matcher.get_matching_blocks())
+
+# Function to compare the extracted texts of two slides, from 0 (unrelated) to 1 (same text).
+# None if either slide has no text (e.g. a scanned page): the texts cannot tell whether the slides are the same.
+def text_similarity(a, b):
+    a, b = " ".join(a.split()), " ".join(b.split())
+    if not a or not b:
+        return None
+    return 2 * matched_characters(a, b) / (len(a) + len(b))
+
+# Function to measure how much of the text of a slide is found in the text of the next one, from 0 to 1,
+# so that a build slide is covered by the following one adding a bullet. None if either slide has no text.
+def text_containment(a, b):
+    a, b = " ".join(a.split()), " ".join(b.split())
+    if not a or not b:
+        return None
+    return matched_characters(a, b) / len(a)
+
+# Detector of near-duplicate slides: same picture (close image hashes) and same text.
+# Slides without extracted text are never considered duplicates, the image hash alone is not enough to tell
+# apart slides built on the same template.
+# The texts (slow to compare) are only compared when the hashes are close, and a slide is only compared with
+# the last `lookback` slides transcribed.
+class SlideDeduplicator:
+    def __init__(self, max_distance=DEDUP_MAX_DISTANCE, min_similarity=DEDUP_TEXT_SIMILARITY, lookback=DEDUP_LOOKBACK):
+        self.max_distance = max_distance
+        self.min_similarity = min_similarity
+        self.kept = deque(maxlen=lookback)  # (index, hash, text) of the last slides transcribed
+
+    def similar(self, hash_a, text_a, hash_b, text_b, text_score):
+        if hamming_distance(hash_a, hash_b) > self.max_distance:
+            return False
+        score = text_score(text_a, text_b)
+        return score is not None and score >= self.min_similarity
+
+    # A slide whose text is (almost) all in the next one, e.g. one step of a build
+    def is_covered_by_next(self, hash_a, text_a, hash_b, text_b):
+        return self.similar(hash_a, text_a, hash_b, text_b, text_containment)
+
+    # A slide with (almost) the same text as another one
+    def is_duplicate(self, hash_a, text_a, hash_b, text_b):
+        return self.similar(hash_a, text_a, hash_b, text_b, text_similarity)
+
+    # Generator taking the (page, text) of each slide and yielding (page, text, duplicate_of) in the same order.
+    # duplicate_of is the index of the slide covering this one, or None if it has to be transcribed:
+    # - in a run of consecutive near-duplicates (e.g. a bullet list built one bullet at a time) only the last,
+    #   most complete slide is kept, so each slide is compared with the next one (one slide of lookahead);
+    # - a slide repeating an earlier one (e.g. a section divider or an agenda shown again) is covered by it.
+    # Slides without a rendered page (e.g. already transcribed by a previous run) are never skipped.
+    def collapse(self, slides):
+        previous = None
+        for i, (page, text) in enumerate(slides):
+            current = (i, page, text, dhash(page) if page is not None else None)
+            if previous is not None:
+                yield self.resolve(previous, current)
+            previous = current
+        if previous is not None:
+            yield self.resolve(previous, None)
+
+    def resolve(self, slide, next_slide):
+        i, page, text, page_hash = slide
+        duplicate_of = None
+        if page_hash is not None:
+            if next_slide is not None and next_slide[3] is not None \
+                    and self.is_covered_by_next(page_hash, text, next_slide[3], next_slide[2]):
+                duplicate_of = next_slide[0]
+            else:
+                for kept_index, kept_hash, kept_text in self.kept:
+                    if self.is_duplicate(page_hash, text, kept_hash, kept_text):
+                        duplicate_of = kept_index
+                        break
+            if duplicate_of is None:
+                self.kept.append((i, page_hash, text))
+        return page, text, duplicate_of
+
+# Function to describe the skipped slides, e.g. "slides 3, 4 merged into slide 5; slide 9 repeats slide 2"
+def format_report(duplicates):
+    # A skipped slide may point to another skipped slide of the same run, follow the chain to the transcribed one
+    def covering(i):
+        while i in duplicates:
+            i = duplicates[i]
+        return i
+
+    groups = {}
+    for i in sorted(duplicates):
+        groups.setdefault(covering(i), []).append(i)
+
+    def slides(indices):
+        return ("slide " if len(indices) == 1 else "slides ") + ", ".join(str(i + 1) for i in indices)
+
+    parts = []
+    for kept, skipped in sorted(groups.items()):
+        merged = [i for i in skipped if i < kept]
+        repeats = [i for i in skipped if i > kept]
+        if merged:
+            parts.append(f"{slides(merged)} merged into slide {kept + 1}")
+        if repeats:
+            parts.append(f"{slides(repeats)} {'repeats' if len(repeats) == 1 else 'repeat'} slide {kept + 1}")
+    return "; ".join(parts)
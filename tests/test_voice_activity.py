@@ -0,0 +1,59 @@
+import numpy as np
+
+from voice_activity import (
+    sample_rate, vad_frame_ms, iter_speech_segments, iter_speech_windows, to_recording_time
+)
+
+FRAME = sample_rate * vad_frame_ms // 1000
+
+def speech(seconds):
+    return (0.3 * np.sin(np.arange(int(seconds * sample_rate)) * 0.1)).astype(np.float32)
+
+def silence(seconds):
+    return np.zeros(int(seconds * sample_rate), dtype=np.float32)
+
+# Frames below the threshold, each quieter than the previous one
+def fading_noise(frames):
+    signs = np.sign(np.sin(np.arange(FRAME)) + 1e-3)
+    return np.concatenate([
+        (10 ** ((-50 - i) / 20) * signs).astype(np.float32) for i in range(frames)
+    ])
+
+def test_speech_segments_skip_silence():
+    audio = np.concatenate([silence(3), speech(2), silence(5), speech(1)])
+    segments = list(iter_speech_segments([audio[i:i + 8000] for i in range(0, len(audio), 8000)]))
+    assert len(segments) == 2
+    starts = [start / sample_rate for start, _ in segments]
+    assert 2.7 < starts[0] < 3.0
+    assert 9.7 < starts[1] < 10.0
+    assert all(len(segment) <= 30 * sample_rate for _, segment in segments)
+
+def test_split_inside_a_silence_does_not_produce_an_empty_segment():
+    # The max-length split falls on the quietest (last) frame of a fade into silence,
+    # so only silence is left of the segment when the pause ends
+    for tail in (silence(1), np.zeros(0, dtype=np.float32)):
+        audio = np.concatenate([speech(29.46), fading_noise(18), tail])
+        segments = list(iter_speech_segments([audio]))
+        assert segments
+        assert all(len(segment) > 0 for _, segment in segments)
+        assert sum(len(segment) for _, segment in segments) <= len(audio)
+
+def test_long_speech_is_split_into_windows():
+    segments = list(iter_speech_segments([speech(75)]))
+    assert len(segments) == 3
+    assert all(len(segment) <= 30 * sample_rate for _, segment in segments)
+    # The pieces follow each other without gaps or overlaps
+    for (start, segment), (next_start, _) in zip(segments, segments[1:]):
+        assert start + len(segment) == next_start
+
+def test_windows_map_back_to_the_recording():
+    segments = [(16000, speech(2)), (160000, speech(3))]
+    windows = list(iter_speech_windows(segments))
+    assert len(windows) == 1
+    window, spans = windows[0]
+    assert len(window) == sum(length for _, _, length in spans) + int(0.3 * sample_rate)
+    assert to_recording_time(0.5, spans) == 1.5
+    # In the second segment, after the first one and the gap
+    assert to_recording_time(2.3 + 1.0, spans) == 11.0
+    # In the gap: moved to the start of the next segment
+    assert to_recording_time(2.1, spans) == 10.0
@@ -0,0 +1,84 @@
+import os
+import hashlib
+
+# Configuration
+THUMBNAIL_CACHE_DIR = os.getenv(
+    "THUMBNAIL_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "gpt-slide-notes", "thumbnails")
+)
+THUMBNAIL_CACHE_MAX_BYTES = int(os.getenv("THUMBNAIL_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Persistent thumbnail cache shared across sessions.
+# Thumbnails are stored as <root>/<hash[:2]>/<hash>/<dpi>/page_<index>.png, where hash is the SHA-256 of the PDF content,
+# so renaming or moving a file keeps its thumbnails while editing it invalidates them.
+# The modification time of each file is used as its last access time for the LRU eviction.
+class ThumbnailCache:
+    def __init__(self, root=THUMBNAIL_CACHE_DIR, max_bytes=THUMBNAIL_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    # Function to compute the content hash of a file
+    @staticmethod
+    def hash_file(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    # Directory holding the thumbnails of a document at the given DPI, created if needed
+    def page_dir(self, file_hash, dpi):
+        path = os.path.join(self.root, file_hash[:2], file_hash, str(dpi))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def page_path(self, file_hash, dpi, page_index):
+        return os.path.join(self.page_dir(file_hash, dpi), f"page_{page_index}.png")
+
+    # Return the path of a cached thumbnail, or None if it was not rendered yet
+    def get(self, file_hash, dpi, page_index):
+        path = self.page_path(file_hash, dpi, page_index)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    # Move a freshly rendered image (which must be in page_dir) into the cache
+    def put(self, file_hash, dpi, page_index, rendered_path):
+        path = self.page_path(file_hash, dpi, page_index)
+        os.replace(rendered_path, path)
+        return path
+
+    # Delete the least recently used thumbnails until the cache fits in max_bytes,
+    # never touching the ones of keep_hash (the document currently open)
+    def evict(self, keep_hash=None):
+        entries = []
+        total_size = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                total_size += stat.st_size
+                if keep_hash is None or keep_hash not in path:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+            except FileNotFoundError:
+                pass
+
+        # Remove the directories left empty
+        for dirpath, _, _ in os.walk(self.root, topdown=False):
+            if dirpath != self.root and not os.listdir(dirpath):
+                try:
+                    os.rmdir(dirpath)
+                except OSError:
+                    pass
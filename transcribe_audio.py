@@ -2,52 +2,336 @@ import torch
 from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor, pipeline
 import librosa
 import soundfile as sf
+import numpy as np
 import os
+import re
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+
+from voice_activity import vad_threshold_db, iter_speech_segments, iter_speech_windows, to_recording_time
 
 # ----------------------------- Configuration ----------------------------- #
 
 # Path configurations
-audio_input_path = "C:\\Users\\david\\Documents\\Registrazioni di suoni\\KGE-2-10.m4a"
 output_dir = "audios"
 transcription_output = "transcriptions.txt"
 
 # Model configuration
 model_id = "openai/whisper-large-v3-turbo"
+chunk_length_s = 30  # Length of the windows the recordings are split into
+stride_length_s = 5  # Overlap between consecutive windows
+batch_size = 8  # Number of windows transcribed together
+
+# CPU mode configuration (for machines without a GPU)
+cpu_mode = False  # Run on the CPU even if a GPU is available
+quantize = True  # In CPU mode, quantize the linear layers of the model to int8 (dynamic quantization)
+num_threads = os.cpu_count()  # Threads used inside each operation (matrix products, convolutions)
+interop_threads = 1  # Threads running independent operations in parallel
+attention = "sdpa"  # Attention implementation: "sdpa" (PyTorch scaled_dot_product_attention) or "eager"
+workers = 1  # Processes transcribing windows in parallel on the CPU, each with num_threads / workers threads
+
+# Audio decoding configuration
+sample_rate = 16000  # Sample rate expected by Whisper
+stream_decode = True  # Decode with an ffmpeg pipe straight into memory instead of converting to a WAV file first
+decode_block_s = 5  # Seconds of audio read from ffmpeg at a time
+max_overlap_words = 40  # Words compared when joining the transcriptions of two overlapping windows
+
+# Voice activity detection configuration (the detection settings are in voice_activity.py)
+vad = False  # Transcribe only the speech: silences are cut out and the speech segments packed into windows
+
+# Recordings picked up when a directory is given
+audio_extensions = (".m4a", ".mp3", ".wav", ".flac", ".ogg", ".opus", ".webm", ".mp4", ".aac")
+
+# ----------------------------- Transcription Engine ----------------------------- #
+
+class TranscriptionEngine:
+    """
+    Loads the Whisper model once and transcribes any number of recordings with it.
+    The windows of each recording are fed to the model batch_size at a time.
+    With stream_decode (and ffmpeg installed), recordings are decoded in small blocks and cut into windows in memory,
+    so memory use does not grow with the length of the recording and no WAV file is written.
+    In CPU mode the model runs in float32 on the CPU with explicit thread settings, and its linear layers
+    (most of Whisper's compute) can be quantized to int8.
+    With vad, only the speech is transcribed and the result also holds timestamped segments on the recording's timeline.
+    With more than one worker, the model is loaded in each of the worker processes (in CPU mode) instead of this one,
+    and the windows are spread over them; call close() (or use the engine in a with statement) to stop them.
+    """
+
+    def __init__(self, model_id=model_id, batch_size=batch_size, chunk_length_s=chunk_length_s, stride_length_s=stride_length_s,
+                 stream_decode=stream_decode, cpu_mode=cpu_mode, quantize=quantize, num_threads=num_threads,
+                 interop_threads=interop_threads, attention=attention, vad=vad, vad_threshold_db=vad_threshold_db,
+                 workers=workers):
+        self.batch_size = batch_size
+        self.vad = vad
+        self.vad_threshold_db = vad_threshold_db
+        self.chunk_length_s = chunk_length_s
+        self.stride_length_s = stride_length_s
+        self.stream_decode = stream_decode and shutil.which("ffmpeg") is not None
+        if stream_decode and not self.stream_decode:
+            print("ffmpeg not found, recordings will be converted to WAV files first.")
+
+        self.executor = None
+        if workers > 1:
+            # The threads are split between the workers, so they do not compete for the same cores
+            worker_threads = max(1, (num_threads or os.cpu_count()) // workers)
+            print(f"Starting {workers} worker processes with {worker_threads} threads each...")
+            self.executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=load_worker_pipeline,
+                initargs=(model_id, chunk_length_s, stride_length_s, quantize, worker_threads, attention)
+            )
+            # Windows sent ahead of the one being waited for, enough to keep every worker busy
+            self.max_pending = 2 * workers
+            self.asr_pipeline = None
+        else:
+            self.asr_pipeline = load_asr_pipeline(
+                model_id, chunk_length_s, stride_length_s, cpu_mode, quantize, num_threads, interop_threads, attention
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.executor:
+            self.executor.shutdown()
+            self.executor = None
+
+    def run_pipeline(self, inputs, **kwargs):
+        """
+        Transcribes the windows, yielding the pipeline output of each one in order. With worker processes,
+        each window is a task of its own, so every worker gets work even on short recordings, and at most
+        max_pending (2 * workers) windows are in flight, so the recording is still decoded as it is transcribed.
+        """
+        if self.executor is None:
+            yield from self.asr_pipeline(inputs, batch_size=self.batch_size, **kwargs)
+            return
+        pending = deque()
+        for window in inputs:
+            pending.append(self.executor.submit(transcribe_window, window, kwargs))
+            if len(pending) >= self.max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def transcribe(self, audio_input_path):
+        """
+        Transcribes a recording, returning a dict with its transcription, its duration,
+        the processing time and the real-time factor (processing time / duration, lower is faster).
+        """
+        if self.stream_decode or self.vad or self.executor:
+            return self.transcribe_stream(audio_input_path)
+
+        start = time.perf_counter()
+        converted_audio_path = convert_audio_to_wav(
+            audio_input_path,
+            os.path.join(output_dir, os.path.splitext(os.path.basename(audio_input_path))[0] + ".wav"),
+            target_sr=16000
+        )
+        if not converted_audio_path:
+            return None
+
+        duration = sf.info(converted_audio_path).duration
+        transcription = transcribe_audio(self.asr_pipeline, converted_audio_path, self.batch_size)
+        if transcription is None:
+            return None
+        elapsed = time.perf_counter() - start
+        return {
+            "audio": audio_input_path,
+            "converted_audio": converted_audio_path,
+            "transcription": transcription,
+            "duration": duration,
+            "seconds": elapsed,
+            "rtf": elapsed / duration if duration else 0.0
+        }
+
+    def transcribe_stream(self, audio_input_path):
+        """
+        Transcribes a recording decoded on the fly: the windows are transcribed as they are decoded,
+        and the transcriptions of consecutive windows are joined removing the text repeated in their overlap.
+        With vad, the windows are packed with the speech segments instead (see transcribe_speech).
+        Without ffmpeg, the recording is converted to a WAV file first and read back in blocks.
+        """
+        start = time.perf_counter()
+        decoded_samples = 0
+        segments = None
+
+        def count_samples(blocks):
+            nonlocal decoded_samples
+            for block in blocks:
+                decoded_samples += len(block)
+                yield block
+
+        if self.stream_decode:
+            converted_audio_path = audio_input_path
+            blocks = iter_pcm_blocks(audio_input_path)
+        else:
+            converted_audio_path = convert_audio_to_wav(
+                audio_input_path,
+                os.path.join(output_dir, os.path.splitext(os.path.basename(audio_input_path))[0] + ".wav"),
+                target_sr=sample_rate
+            )
+            if not converted_audio_path:
+                return None
+            blocks = sf.blocks(converted_audio_path, blocksize=int(decode_block_s * sample_rate), dtype="float32")
+
+        try:
+            print(f"Transcribing audio file: {audio_input_path}")
+            if self.vad:
+                segments = self.transcribe_speech(count_samples(blocks))
+                transcription = " ".join(text for _, _, text in segments if text)
+            else:
+                windows = iter_audio_windows(count_samples(blocks), self.chunk_length_s, self.stride_length_s)
+                inputs = ({"raw": window, "sampling_rate": sample_rate} for window in windows)
+                outputs = self.run_pipeline(inputs)
+                transcription = stitch_texts(output.get("text", "") for output in outputs)
+            print("Transcription successful.")
+        except Exception as e:
+            print(f"Error transcribing {audio_input_path}: {e}")
+            return None
+
+        duration = decoded_samples / sample_rate
+        elapsed = time.perf_counter() - start
+        result = {
+            "audio": audio_input_path,
+            "converted_audio": converted_audio_path,
+            "transcription": transcription,
+            "duration": duration,
+            "seconds": elapsed,
+            "rtf": elapsed / duration if duration else 0.0
+        }
+        if segments is not None:
+            result["segments"] = segments
+            result["speech_duration"] = self.speech_samples / sample_rate
+        return result
+
+    def transcribe_speech(self, blocks):
+        """
+        Transcribes only the speech of the audio blocks: the speech segments found by the voice activity detection
+        are packed into windows of at most chunk_length_s seconds, and the timestamps Whisper returns for each window
+        are mapped back to the recording's timeline. Returns a list of (start, end, text) with times in seconds.
+        """
+        self.speech_samples = 0
+        pending_spans = deque()
+
+        def inputs():
+            speech = iter_speech_segments(blocks, self.chunk_length_s, self.vad_threshold_db)
+            for window, spans in iter_speech_windows(speech, self.chunk_length_s):
+                self.speech_samples += sum(length for _, _, length in spans)
+                pending_spans.append(spans)
+                yield {"raw": window, "sampling_rate": sample_rate}
+
+        segments = []
+        # The outputs come in the order of the windows, so each one matches the oldest spans not used yet
+        for output in self.run_pipeline(inputs(), return_timestamps=True):
+            spans = pending_spans.popleft()
+            window_end = (spans[-1][0] + spans[-1][2]) / sample_rate
+            for chunk in output.get("chunks", []):
+                chunk_start, chunk_end = chunk["timestamp"]
+                segments.append((
+                    to_recording_time(chunk_start or 0.0, spans),
+                    to_recording_time(window_end if chunk_end is None else chunk_end, spans),
+                    chunk["text"].strip()
+                ))
+        return segments
+
+    def transcribe_many(self, audio_paths):
+        """
+        Transcribes the recordings one after the other, yielding the result of each one (None if it failed).
+        """
+        for audio_path in audio_paths:
+            yield self.transcribe(audio_path)
+
+# ----------------------------- Model Loading ----------------------------- #
+
+def load_asr_pipeline(model_id=model_id, chunk_length_s=chunk_length_s, stride_length_s=stride_length_s, cpu_mode=cpu_mode,
+                      quantize=quantize, num_threads=num_threads, interop_threads=interop_threads, attention=attention):
+    """
+    Loads the Whisper model and wraps it in an ASR pipeline.
+    """
+    # Determine device and data type
+    use_gpu = torch.cuda.is_available() and not cpu_mode
+    torch_dtype = torch.float16 if use_gpu else torch.float32
+    if not use_gpu:
+        configure_cpu_threads(num_threads, interop_threads)
+
+    print("Loading Whisper model...")
+    model = AutoModelForSpeechSeq2Seq.from_pretrained(
+        model_id,
+        torch_dtype=torch_dtype,
+        low_cpu_mem_usage=True,
+        device_map="auto" if use_gpu else None,  # Automatically map layers to GPU
+        use_safetensors=True,
+        attn_implementation=attention
+    )
+    if cpu_mode and quantize:
+        model = quantize_linear_layers(model)
+    print("Model loaded successfully.")
+
+    # Load the processor
+    processor = AutoProcessor.from_pretrained(model_id)
 
-# ----------------------------- Setup ----------------------------- #
-
-# Determine device and data type
-device = 0 if torch.cuda.is_available() else -1  # Use GPU if available
-torch_dtype = torch.float16 if torch.cuda.is_available() else torch.float32
-
-# Create output directory if it doesn't exist
-os.makedirs(output_dir, exist_ok=True)
-
-# ----------------------------- Load Model ----------------------------- #
-
-print("Loading Whisper model...")
-model = AutoModelForSpeechSeq2Seq.from_pretrained(
-    model_id,
-    torch_dtype=torch_dtype,
-    low_cpu_mem_usage=True,
-    device_map="auto" if torch.cuda.is_available() else None,  # Automatically map layers to GPU
-    use_safetensors=True
-)
-print("Model loaded successfully.")
-
-# Load the processor
-processor = AutoProcessor.from_pretrained(model_id)
-
-# Initialize the ASR pipeline
-asr_pipeline = pipeline(
-    "automatic-speech-recognition",
-    model=model,
-    tokenizer=processor.tokenizer,
-    feature_extractor=processor.feature_extractor,
-    # device=device,  # -1 for CPU, 0 for first GPU
-    chunk_length_s=30,  # Adjust based on your audio length and memory
-    stride_length_s=5
-)
+    # Initialize the ASR pipeline
+    return pipeline(
+        "automatic-speech-recognition",
+        model=model,
+        tokenizer=processor.tokenizer,
+        feature_extractor=processor.feature_extractor,
+        device="cpu" if cpu_mode else None,
+        chunk_length_s=chunk_length_s,
+        stride_length_s=stride_length_s
+    )
+
+# The pipeline of a worker process, loaded once by load_worker_pipeline
+_worker_pipeline = None
+
+def load_worker_pipeline(model_id, chunk_length_s, stride_length_s, quantize, num_threads, attention):
+    """
+    Initializer of the worker processes: loads the model on the CPU, with a single inter-op thread.
+    Each worker keeps its own copy of the weights (about 3 GB for whisper-large-v3-turbo in float32, about 1 GB
+    with int8 linear layers), so the number of workers is limited by the memory as much as by the cores.
+    """
+    global _worker_pipeline
+    _worker_pipeline = load_asr_pipeline(
+        model_id, chunk_length_s, stride_length_s, True, quantize, num_threads, 1, attention
+    )
+
+def transcribe_window(window, kwargs):
+    return _worker_pipeline(window, **kwargs)
+
+# ----------------------------- CPU Inference ----------------------------- #
+
+def configure_cpu_threads(num_threads=num_threads, interop_threads=interop_threads):
+    """
+    Sets the number of threads PyTorch uses within and across operations.
+    The inter-op setting can only be changed before the first parallel operation, later attempts are ignored.
+    """
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    if interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            pass
+    print(f"Using {torch.get_num_threads()} threads ({torch.get_num_interop_threads()} inter-op) on the CPU.")
+
+def quantize_linear_layers(model):
+    """
+    Quantizes the weights of the linear layers to int8; activations are quantized on the fly at each call.
+    """
+    print("Quantizing the linear layers to int8...")
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
 
 # ----------------------------- Audio Conversion ----------------------------- #
 
@@ -56,6 +340,7 @@ def convert_audio_to_wav(input_path, output_path, target_sr=16000):
     Converts an audio file to WAV format with the specified sample rate.
     """
     try:
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
         print(f"Loading audio file: {input_path}")
         y, sr = librosa.load(input_path, sr=target_sr)
         print(f"Saving converted audio to: {output_path}")
@@ -66,49 +351,191 @@ def convert_audio_to_wav(input_path, output_path, target_sr=16000):
         print(f"Error converting {input_path}: {e}")
         return None
 
-# Convert the input audio
-converted_audio_path = convert_audio_to_wav(
-    audio_input_path,
-    os.path.join(output_dir, "KGE-2-10.wav"),
-    target_sr=16000
-)
+def iter_pcm_blocks(input_path, target_sr=sample_rate, block_s=decode_block_s):
+    """
+    Decodes an audio file with ffmpeg, yielding mono float32 blocks of block_s seconds at the specified sample rate.
+    Only the block being read is kept in memory. The errors of ffmpeg go to a temporary file: a damaged recording
+    can produce more of them than a pipe holds, which would block ffmpeg while we wait for its output.
+    """
+    command = [
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-i", input_path,
+        "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(target_sr), "pipe:1"
+    ]
+    errors = tempfile.TemporaryFile()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=errors)
+    block_bytes = int(block_s * target_sr) * 2
+    try:
+        while True:
+            data = process.stdout.read(block_bytes)
+            if not data:
+                break
+            yield np.frombuffer(data[:len(data) // 2 * 2], dtype=np.int16).astype(np.float32) / 32768.0
+        if process.wait() != 0:
+            errors.seek(0)
+            message = errors.read().decode(errors='replace').strip().splitlines()[-5:]
+            raise RuntimeError(f"ffmpeg failed to decode {input_path}: {' '.join(message)}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        errors.close()
 
-if not converted_audio_path:
-    print("Audio conversion failed. Exiting.")
-    exit(1)
+def iter_audio_windows(blocks, window_s=chunk_length_s, overlap_s=stride_length_s, target_sr=sample_rate):
+    """
+    Regroups audio blocks into windows of window_s seconds, each one starting overlap_s seconds before the end of the previous one.
+    The last window holds whatever is left and can be shorter.
+    """
+    window = int(window_s * target_sr)
+    overlap = int(overlap_s * target_sr)
+    buffer = np.zeros(0, dtype=np.float32)
+    emitted = False
+    for block in blocks:
+        buffer = np.concatenate([buffer, block])
+        while len(buffer) >= window:
+            yield buffer[:window]
+            emitted = True
+            buffer = buffer[window - overlap:]
+    # Audio after the overlap with the last window (or a recording shorter than a window)
+    if len(buffer) > (overlap if emitted else 0):
+        yield buffer
+
+# ----------------------------- Transcript Stitching ----------------------------- #
+
+def normalize_word(word):
+    return re.sub(r"[^\w']", "", word).lower()
+
+def stitch_texts(texts, max_overlap_words=max_overlap_words, min_overlap_words=3):
+    """
+    Joins the transcriptions of consecutive overlapping windows. The end of the text so far and the start of the
+    next transcription are compared word by word (ignoring case and punctuation), and the words of the longest common
+    run, transcribed twice because they are in the overlap, are only kept once.
+    """
+    words = []
+    for text in texts:
+        new_words = text.split()
+        if words and new_words:
+            tail = words[-max_overlap_words:]
+            head = new_words[:max_overlap_words]
+            match = SequenceMatcher(
+                None, [normalize_word(w) for w in tail], [normalize_word(w) for w in head], autojunk=False
+            ).find_longest_match(0, len(tail), 0, len(head))
+            if match.size >= min_overlap_words:
+                # The next window saw what follows the overlap, so its version of the shared words is kept
+                words = words[:len(words) - len(tail) + match.a]
+                new_words = new_words[match.b:]
+        words.extend(new_words)
+    return " ".join(words)
+
+def find_audio_files(paths):
+    """
+    Collects the recordings from the given files and directories, in name order.
+    """
+    audio_paths = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                # Sorting dirs in place makes os.walk visit the subdirectories in name order too
+                dirs.sort()
+                audio_paths.extend(
+                    os.path.join(root, f) for f in sorted(files) if f.lower().endswith(audio_extensions)
+                )
+        elif os.path.isfile(path):
+            audio_paths.append(path)
+        else:
+            print(f"Skipping {path}: not a file or directory.")
+    return audio_paths
 
 # ----------------------------- Transcription ----------------------------- #
 
-def transcribe_audio(pipeline, audio_path):
+def transcribe_audio(pipeline, audio_path, batch_size=batch_size):
     """
-    Transcribes the given audio file using the provided ASR pipeline.
+    Transcribes the given audio file using the provided ASR pipeline, returning None if it failed.
     """
     try:
         print(f"Transcribing audio file: {audio_path}")
-        result = pipeline(audio_path)
+        result = pipeline(audio_path, batch_size=batch_size)
         transcription = result.get("text", "")
         print("Transcription successful.")
         return transcription
     except Exception as e:
         print(f"Error transcribing {audio_path}: {e}")
-        return ""
-
-# Perform transcription
-transcription = transcribe_audio(asr_pipeline, converted_audio_path)
+        return None
 
 # ----------------------------- Save Transcription ----------------------------- #
 
-def save_transcription(output_file, audio_path, transcription_text):
+def format_timestamp(seconds):
+    return time.strftime("%H:%M:%S", time.gmtime(seconds))
+
+def save_transcription(output_file, audio_path, transcription_text, segments=None):
     """
-    Saves the transcription to a text file.
+    Saves the transcription to a text file, followed by the timestamped segments if given.
     """
     try:
         with open(output_file, "a", encoding="utf-8") as f:
             f.write(f"Audio: {audio_path}\n")
-            f.write(f"Transcription: {transcription_text}\n\n")
+            f.write(f"Transcription: {transcription_text}\n")
+            if segments:
+                f.write("Segments:\n")
+                for segment_start, segment_end, text in segments:
+                    f.write(f"[{format_timestamp(segment_start)} - {format_timestamp(segment_end)}] {text}\n")
+            f.write("\n")
         print(f"Transcription saved to {output_file}")
     except Exception as e:
         print(f"Error saving transcription: {e}")
 
-# Save the transcription
-save_transcription(transcription_output, converted_audio_path, transcription)
+# ----------------------------- Main ----------------------------- #
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe lecture recordings with Whisper, loading the model once.")
+    parser.add_argument("paths", nargs="+", help="audio files or directories containing audio files")
+    parser.add_argument("-o", "--output", default=transcription_output, help="file the transcriptions are appended to")
+    parser.add_argument("--model", default=model_id)
+    parser.add_argument("--batch-size", type=int, default=batch_size,
+                        help="number of 30 s windows transcribed together (without --workers, which spread the windows one by one)")
+    parser.add_argument("--convert-to-wav", action="store_true", default=not stream_decode,
+                        help=f"convert each recording to a WAV file in {output_dir} instead of decoding it on the fly")
+    parser.add_argument("--cpu", action="store_true", default=cpu_mode, help="run on the CPU, with int8 linear layers")
+    parser.add_argument("--no-quantize", action="store_true", default=not quantize, help="keep the float32 weights in CPU mode")
+    parser.add_argument("--threads", type=int, default=num_threads, help="intra-op threads on the CPU")
+    parser.add_argument("--interop-threads", type=int, default=interop_threads, help="inter-op threads on the CPU")
+    parser.add_argument("--attention", default=attention, choices=["sdpa", "eager"])
+    parser.add_argument("--workers", type=int, default=workers,
+                        help="processes transcribing windows in parallel on the CPU, each loading its own copy "
+                             "of the model (about 3 GB in float32, 1 GB with int8 for the default model)")
+    parser.add_argument("--vad", action="store_true", default=vad, help="transcribe only the speech, skipping silences")
+    parser.add_argument("--vad-threshold", type=float, default=vad_threshold_db, help="loudness in dBFS above which a frame is speech")
+    args = parser.parse_args()
+
+    audio_paths = find_audio_files(args.paths)
+    if not audio_paths:
+        print("No audio files found.")
+        return 1
+
+    with TranscriptionEngine(
+        args.model, args.batch_size, stream_decode=not args.convert_to_wav, cpu_mode=args.cpu,
+        quantize=not args.no_quantize, num_threads=args.threads, interop_threads=args.interop_threads,
+        attention=args.attention, vad=args.vad, vad_threshold_db=args.vad_threshold, workers=args.workers
+    ) as engine:
+        total_duration = 0.0
+        total_seconds = 0.0
+        failed = 0
+        for audio_path, result in zip(audio_paths, engine.transcribe_many(audio_paths)):
+            if result is None:
+                failed += 1
+                continue
+            save_transcription(args.output, result["converted_audio"], result["transcription"], result.get("segments"))
+            total_duration += result["duration"]
+            total_seconds += result["seconds"]
+            print(f"{os.path.basename(audio_path)}: {result['duration'] / 60:.1f} min of audio in {result['seconds']:.1f}s "
+                  f"(real-time factor {result['rtf']:.3f})")
+            if "speech_duration" in result and result["duration"]:
+                print(f"  speech: {result['speech_duration'] / 60:.1f} min, {1 - result['speech_duration'] / result['duration']:.0%} of the recording skipped")
+
+        print(f"\nTranscribed {len(audio_paths) - failed}/{len(audio_paths)} files, "
+              f"{total_duration / 60:.1f} min of audio in {total_seconds / 60:.1f} min "
+              f"(real-time factor {total_seconds / total_duration if total_duration else 0.0:.3f})")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+import os
+import sys
+import time
+import hashlib
+import argparse
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from transcript_core import (
+    API_KEY, API_ENDPOINT, MODEL_NAME, MAX_WORKERS, USE_CACHE, IMAGE_DETAIL, BATCH_MODE, STREAM_RESPONSES, TEXT_WORKERS,
+    TranscriptJob, partial_path, save_transcript_file
+)
+from response_cache import ResponseCache
+from scheduler import RequestScheduler
+from slide_dedup import DEDUP_SLIDES
+from metrics import RUN_REPORT_DIR
+
+# Headless driver: transcribes many PDFs without the GUI, sharing a single budget of in-flight requests between them.
+#
+#   python transcribe_cli.py lectures/ extra.pdf --concurrency 8 --output-dir notes
+
+print_lock = threading.Lock()
+
+def log(message):
+    with print_lock:
+        print(message, flush=True)
+
+# Function to collect the PDFs from the given files and directories (each file once, even if given twice)
+def find_pdfs(paths):
+    pdfs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                pdfs.extend(os.path.join(root, f) for f in sorted(files) if f.lower().endswith(".pdf"))
+        elif path.lower().endswith(".pdf") and os.path.isfile(path):
+            pdfs.append(path)
+        else:
+            log(f"Skipping {path}: not a PDF file or directory.")
+    unique = {}
+    for pdf in pdfs:
+        unique.setdefault(os.path.realpath(pdf), pdf)
+    return list(unique.values())
+
+# Function to choose the transcript file of every PDF: next to it, or in output_dir.
+# In output_dir, PDFs with the same name (e.g. week1/slides.pdf and week2/slides.pdf) get a short hash
+# of their path appended, so they do not overwrite each other.
+def output_paths_for(pdfs, output_dir):
+    def stem(pdf_path):
+        return os.path.splitext(os.path.basename(pdf_path))[0]
+
+    # Compared without case, for case-insensitive file systems
+    counts = Counter(stem(pdf).lower() for pdf in pdfs)
+    paths = {}
+    for pdf in pdfs:
+        name = stem(pdf)
+        if output_dir and counts[name.lower()] > 1:
+            name += "_" + hashlib.sha1(os.path.realpath(pdf).encode("utf-8")).hexdigest()[:8]
+        paths[pdf] = os.path.join(output_dir or os.path.dirname(pdf), name + ".txt")
+    return paths
+
+# Transcribe a single deck, printing its progress every 10%
+def process_pdf(pdf_path, output_path, args, cache, scheduler, text_workers):
+    name = os.path.basename(pdf_path)
+    last_reported = [-10]
+
+    def progress(value):
+        if value >= last_reported[0] + 10 or value == 100:
+            last_reported[0] = value
+            log(f"[{name}] {value}%")
+
+    def status(message):
+        if args.verbose:
+            log(f"[{name}] {message.strip()}")
+
+    # The notes are written to a partial file as they are generated, which becomes the output file with the final
+    # transcript; if the run fails, the partial file is left and an existing output file is not touched
+    live_file = open(partial_path(output_path), 'w', encoding='utf-8')
+
+    def write_live(text):
+        live_file.write(text)
+        live_file.flush()
+
+    def save_transcript(final_transcript):
+        live_file.close()
+        save_transcript_file(output_path, final_transcript)
+
+    # Each deck can use the whole budget, the shared scheduler keeps the total within it
+    job = TranscriptJob(
+        pdf_path, args.api_key, args.endpoint, args.model,
+        args.concurrency if args.parallel_slides else 1, not args.no_cache, args.image_detail, args.batch,
+        args.dedup, cache=cache, scheduler=scheduler, progress_callback=progress, status_callback=status,
+        report_dir=args.report_dir, stream=not args.no_stream, live_callback=write_live, text_workers=text_workers
+    )
+    start = time.perf_counter()
+    try:
+        job.run(save_transcript)
+    finally:
+        live_file.close()
+    elapsed = time.perf_counter() - start
+    log(f"[{name}] Done: {job.num_slides} slides in {elapsed:.1f}s, saved to {output_path}. {job.summary()}".rstrip())
+    return job.num_slides, len(job.failed_slides), elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the slide notes of many PDFs without the GUI.")
+    parser.add_argument("paths", nargs="+", help="PDF files or directories containing PDF files")
+    parser.add_argument("-o", "--output-dir", help="directory for the transcripts (default: next to each PDF)")
+    parser.add_argument("-c", "--concurrency", type=int, default=max(MAX_WORKERS, 4),
+                        help="maximum number of API requests in flight across all the decks")
+    parser.add_argument("--parallel-slides", action="store_true",
+                        help="also transcribe the slides of each deck concurrently (uses the extracted text of the previous slides as context)")
+    parser.add_argument("--batch", action="store_true", default=BATCH_MODE, help="submit the decks through the batch API")
+    parser.add_argument("--no-cache", action="store_true", default=not USE_CACHE, help="do not reuse cached responses")
+    parser.add_argument("--dedup", action="store_true", default=DEDUP_SLIDES,
+                        help="skip near-duplicate slides (e.g. slides revealing one bullet at a time)")
+    parser.add_argument("--no-stream", action="store_true", default=not STREAM_RESPONSES,
+                        help="wait for each complete response instead of writing the notes as they are generated")
+    parser.add_argument("--api-key", default=API_KEY)
+    parser.add_argument("--endpoint", default=API_ENDPOINT)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--image-detail", default=IMAGE_DETAIL, choices=["auto", "low", "high", "none"])
+    parser.add_argument("--report-dir", default=RUN_REPORT_DIR,
+                        help="write a JSON report with the timings and token usage of each deck to this directory")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print the status of every slide")
+    args = parser.parse_args()
+
+    pdfs = find_pdfs(args.paths)
+    if not pdfs:
+        log("No PDF files found.")
+        return 1
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    output_paths = output_paths_for(pdfs, args.output_dir)
+    cache = None if args.no_cache else ResponseCache()
+    scheduler = RequestScheduler(max_concurrency=args.concurrency)
+
+    # The decks processed at the same time share the cores for the text extraction
+    decks_in_flight = min(args.concurrency, len(pdfs))
+    text_workers = max(1, TEXT_WORKERS // decks_in_flight)
+
+    log(f"Transcribing {len(pdfs)} PDF files with up to {args.concurrency} requests in flight...")
+    start = time.perf_counter()
+    total_slides = 0
+    total_failed = 0
+    failed_decks = []
+    try:
+        with ThreadPoolExecutor(max_workers=decks_in_flight) as executor:
+            futures = {
+                executor.submit(process_pdf, pdf, output_paths[pdf], args, cache, scheduler, text_workers): pdf
+                for pdf in pdfs
+            }
+            for future in as_completed(futures):
+                try:
+                    slides, failed, _ = future.result()
+                    total_slides += slides
+                    total_failed += failed
+                except Exception as e:
+                    failed_decks.append(futures[future])
+                    log(f"[{os.path.basename(futures[future])}] Error: {e}")
+    finally:
+        if cache is not None:
+            cache.close()
+
+    # Throughput summary
+    elapsed = time.perf_counter() - start
+    log("")
+    log(f"Decks: {len(pdfs) - len(failed_decks)}/{len(pdfs)} completed")
+    log(f"Slides: {total_slides} ({total_failed} failed)")
+    log(f"Time: {elapsed:.1f}s, {total_slides / elapsed * 60 if elapsed else 0:.1f} slides/min")
+    log(f"Retried requests: {scheduler.retries}")
+    if cache is not None:
+        log(f"Cache: {cache.stats()}")
+
+    return 1 if failed_decks or total_failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,682 @@
+import os
+import io
+import base64
+import time
+import queue
+import threading
+import multiprocessing
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED, ALL_COMPLETED
+from dotenv import load_dotenv
+
+from response_cache import ResponseCache
+from scheduler import RequestScheduler, default_scheduler
+from batch_api import BATCH_DIR, BatchClient, BatchFileWriter
+from checkpoint import CheckpointJournal
+from pdf_document import PDFDocument
+from prompt_builder import build_messages
+from slide_dedup import DEDUP_SLIDES, SlideDeduplicator, format_report
+from metrics import RUN_REPORT_DIR, RunMetrics
+from api_client import iter_sse
+
+# Heavy dependencies (pdf2image, PyPDF2, requests) are imported where they are first used,
+# so that importing this module (e.g. just for generate_transcript) stays fast and has no side effects.
+
+# Load environment variables from .env file or selected file
+load_dotenv()
+
+# Configuration
+API_KEY = os.getenv("API_KEY", "")
+API_ENDPOINT = os.getenv("API_ENDPOINT", "https://api.openai.com/v1/chat/completions")
+MODEL_NAME = os.getenv("MODEL_NAME", "gpt-4o-mini")
+CONTEXT = 5 # Number of previous transcripts to include as context
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "1"))  # Number of concurrent API requests (1 = sequential)
+USE_CACHE = os.getenv("USE_CACHE", "1") != "0"  # Reuse cached responses for unchanged slides
+BATCH_MODE = os.getenv("BATCH_MODE", "0") == "1"  # Submit the whole deck through the batch API (cheaper, results within 24h)
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "1") != "0"  # Receive the transcripts token by token as they are generated
+RENDER_CHUNK = 4  # Number of pages rendered by each pdftoppm call
+PREFETCH_PAGES = 8  # Maximum number of rendered pages waiting to be transcribed
+TEXT_WORKERS = os.cpu_count() or 1  # Number of processes extracting the text of large PDFs
+PARALLEL_TEXT_MIN_PAGES = 40  # Smaller PDFs are extracted in a single process
+TEXT_CHUNK = 8  # Number of pages extracted by each task of the process pool
+
+# Slide images sent to the model, trading token cost and upload size against quality
+IMAGE_MAX_SIDE = int(os.getenv("IMAGE_MAX_SIDE", "1024"))  # Longest side of the image in pixels (0 = full render resolution)
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "80"))  # JPEG quality
+IMAGE_DETAIL = os.getenv("IMAGE_DETAIL", "auto")  # "low", "high", "auto" or "none" to only send the extracted text
+SAVE_IMAGES = os.getenv("SAVE_IMAGES", "0") == "1"  # Also save every slide image to IMAGE_DIR
+
+IMAGE_DIR = "slide_images"  # Directory to save extracted images
+FAILED_TRANSCRIPT = "### Slide {slide}\n\n*The transcript of this slide could not be generated.*"  # Placeholder for failed slides
+SLIDE_SEPARATOR = "\n\n---\n"  # Between the transcripts of two slides in the final transcript
+
+# Function to encode an image to base64
+def encode_image(image_path):
+    with open(image_path, "rb") as image_file:
+        return base64.b64encode(image_file.read()).decode('utf-8')
+
+# Function to encode a rendered page to a base64 JPEG in memory, downscaled to max_side
+def encode_page_image(page, max_side=IMAGE_MAX_SIDE, quality=IMAGE_QUALITY):
+    if max_side and max(page.size) > max_side:
+        page = page.copy()
+        page.thumbnail((max_side, max_side))
+    buffer = io.BytesIO()
+    page.convert('RGB').save(buffer, 'JPEG', quality=quality, optimize=True)
+    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+
+# Generator rendering the document a few pages at a time, so only RENDER_CHUNK pages are converted at once.
+# The first page is rendered on its own, so its request is sent without waiting for a whole chunk.
+# When max_side is set, pdftoppm directly renders the pages with that longest side instead of rendering at 200 DPI and downscaling.
+# The pages in skip_pages (0-based) are not rendered, None is yielded in their place.
+# The rendering time is recorded as the "render" stage of the optional RunMetrics.
+def iter_pdf_pages(document, chunk_size=RENDER_CHUNK, max_side=IMAGE_MAX_SIDE, skip_pages=(), metrics=None):
+    first_pages = [0] + list(range(1, document.num_pages, chunk_size)) if document.num_pages else []
+    for first_page in first_pages:
+        last_page = min(first_page + chunk_size if first_page else 1, document.num_pages)
+        chunk = range(first_page, last_page)
+        if all(i in skip_pages for i in chunk):
+            yield from (None for _ in chunk)
+            continue
+        with metrics.span("render", chunk) if metrics else nullcontext():
+            rendered = document.render(first_page, last_page, size=max_side or None)
+        for i, page in zip(chunk, rendered):
+            yield None if i in skip_pages else page
+
+# Document opened once by each worker process of the text extraction
+_worker_document = None
+
+def open_worker_document(pdf_path):
+    global _worker_document
+    _worker_document = PDFDocument(pdf_path)
+
+# Function to extract the text of the pages [first_page, last_page) in a worker process, also returning the time it took
+def extract_text_chunk(first_page, last_page):
+    start = time.perf_counter()
+    texts = [_worker_document.text(i) for i in range(first_page, last_page)]
+    return texts, time.perf_counter() - start
+
+# Generator yielding the text of every page in order, as soon as it is extracted.
+# Large PDFs are split in chunks of TEXT_CHUNK pages extracted by a pool of processes,
+# each parsing the file once when it starts; smaller ones are read from the already open document.
+# The processes are spawned rather than forked: the pool is started from a thread of a multithreaded
+# (e.g. Qt) process, whose locks a forked child could inherit while they are held.
+# The extraction time is recorded as the "text" stage of the optional RunMetrics.
+def iter_pdf_texts(document, workers=TEXT_WORKERS, metrics=None):
+    num_pages = document.num_pages
+    if workers <= 1 or num_pages < PARALLEL_TEXT_MIN_PAGES:
+        for i in range(num_pages):
+            with metrics.span("text", [i]) if metrics else nullcontext():
+                text = document.text(i)
+            yield text
+        return
+
+    first_pages = range(0, num_pages, TEXT_CHUNK)
+    last_pages = [min(first_page + TEXT_CHUNK, num_pages) for first_page in first_pages]
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+        initializer=open_worker_document, initargs=(document.path,)
+    ) as executor:
+        # map returns the chunks in order while the following ones are still being extracted
+        for first_page, (texts, seconds) in zip(first_pages, executor.map(extract_text_chunk, first_pages, last_pages)):
+            if metrics:
+                metrics.add_span("text", seconds, range(first_page, first_page + len(texts)))
+            yield from texts
+
+# Function to extract text from PDF
+def extract_text_from_pdf(pdf_path, workers=TEXT_WORKERS):
+    with PDFDocument(pdf_path) as document:
+        return list(iter_pdf_texts(document, workers))
+
+# Generator consuming an iterable in a background thread, keeping at most `size` items ready
+def prefetch(iterable, size=PREFETCH_PAGES):
+    buffer = queue.Queue(maxsize=size)
+    stop = threading.Event()
+    done = object()
+
+    def producer():
+        try:
+            for item in iterable:
+                # Do not block forever if the consumer stopped early
+                while not stop.is_set():
+                    try:
+                        buffer.put((item, None), timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+                if stop.is_set():
+                    return
+            buffer.put((done, None))
+        except Exception as e:
+            buffer.put((done, e))
+
+    thread = threading.Thread(target=producer, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        stop.set()
+
+# Function to build the chat completions payload for a single slide
+# When context_from_text is True, previous_transcripts holds the extracted text of the previous slides instead.
+# image is the base64 JPEG of the slide (see encode_page_image), sent with the given detail level.
+# The slide text and the context are fitted to PROMPT_TOKEN_BUDGET (see prompt_builder.build_messages).
+def build_payload(slide_text, previous_transcripts=[], model_name=MODEL_NAME, context_from_text=False, image=None, image_detail=IMAGE_DETAIL):
+    messages = build_messages(slide_text, previous_transcripts, context_from_text, image, image_detail, model_name)
+
+    # Prepare the payload
+    payload = {
+        "model": model_name,
+        "messages": messages,
+        "max_tokens": 1000,
+        "temperature": 0.7,
+        "stop": ["---"]
+    }
+    return payload
+
+# Function to extract the transcript from a chat completions response
+def parse_transcript(response_data):
+    transcript = response_data['choices'][0]['message']['content'].strip()
+    # Remove everything before "###" if needed
+    if "###" in transcript:
+        transcript = transcript[transcript.find("###"):]
+    return transcript
+
+# Function to read a streamed chat completions response, passing each piece of content to stream_callback as it arrives.
+# Returns the same structure as a non-streamed response (content and usage), so parse_transcript can be used on it.
+def read_stream(response, stream_callback=None):
+    import json
+
+    content = []
+    usage = None
+    for event in iter_sse(response):
+        chunk = json.loads(event)
+        # With include_usage, the last chunk has no choices and carries the usage of the whole request
+        if chunk.get('usage'):
+            usage = chunk['usage']
+        for choice in chunk.get('choices') or []:
+            delta = (choice.get('delta') or {}).get('content')
+            if delta:
+                content.append(delta)
+                if stream_callback:
+                    stream_callback(delta)
+    return {"choices": [{"message": {"content": "".join(content)}}], "usage": usage}
+
+# Function to generate transcript for a single slide
+# If a ResponseCache is given, it is checked before sending the request (pass None to bypass it).
+# The request is paced and retried by the given RequestScheduler (by default one shared by the whole process).
+# usage_callback, if given, receives the token usage reported by the API (not called for cached responses).
+# If stream_callback is given, the response is streamed and every piece of content is passed to it as soon as it arrives
+# (the raw text: the returned transcript is cleaned by parse_transcript). Cached responses are returned without calling it.
+# See build_payload for the other arguments.
+def generate_transcript(slide_text, previous_transcripts=[], api_key=API_KEY, api_endpoint=API_ENDPOINT, model_name=MODEL_NAME, context_from_text=False, cache=None, image=None, image_detail=IMAGE_DETAIL, scheduler=None, usage_callback=None, stream_callback=None):
+    payload = build_payload(slide_text, previous_transcripts, model_name, context_from_text, image, image_detail)
+
+    # Reuse the response if the same request was already answered
+    if cache is not None:
+        cache_key = cache.make_key(api_endpoint, payload)
+        cached_transcript = cache.get(cache_key)
+        if cached_transcript is not None:
+            return cached_transcript
+
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}"
+    }
+
+    # Send the request to the OpenAI API, retrying on rate limits and server errors.
+    # The streaming options are added after computing the cache key, so streamed and complete responses share the cache.
+    scheduler = scheduler or default_scheduler()
+    if stream_callback:
+        payload = {**payload, "stream": True, "stream_options": {"include_usage": True}}
+        response = scheduler.post(api_endpoint, payload, headers=headers, stream=True)
+    else:
+        response = scheduler.post(api_endpoint, payload, headers=headers)
+
+    if response.status_code == 200:
+        try:
+            response_data = read_stream(response, stream_callback) if stream_callback else response.json()
+        finally:
+            response.close()
+        if usage_callback and response_data.get('usage'):
+            usage_callback(response_data['usage'])
+        transcript = parse_transcript(response_data)
+        if cache is not None:
+            cache.put(cache_key, transcript)
+        return transcript
+    else:
+        response.close()
+        return None
+
+# Function to get the file the notes of a run are written to while it runs, next to its output file
+def partial_path(output_path):
+    return output_path + ".partial"
+
+# Function to save the final transcript: it is written to the partial file, which is then moved over the output,
+# so an existing transcript is only ever replaced by a complete one
+def save_transcript_file(output_path, transcript):
+    with open(partial_path(output_path), 'w', encoding='utf-8') as f:
+        f.write(transcript)
+    os.replace(partial_path(output_path), output_path)
+
+# Transcript of a run written as it is generated, in slide order, for a live preview or a partial output file.
+# Slides can finish (or stream) out of order: the text of the first unfinished slide is written as it arrives,
+# the text of the following ones is held back until all the slides before them are done.
+# write is called with consecutive pieces of text; the streamed text is the raw model output, so the final transcript
+# (cleaned up, with the failed slides marked) should replace it at the end of the run.
+class LiveTranscript:
+    def __init__(self, write):
+        self.write = write
+        self.head = 0  # First unfinished slide, whose text is written directly
+        self.pending = {}  # Text streamed by the slides after the head
+        self.finished = {}  # Final text of the finished slides after the head (None for skipped slides)
+        self.opened = set()  # Slides whose text was started, preceded by the separator
+        self.lock = threading.Lock()
+
+    def open(self, i):
+        if i not in self.opened:
+            if self.opened:
+                self.write(SLIDE_SEPARATOR)
+            self.opened.add(i)
+
+    # A piece of the transcript of slide i
+    def add(self, i, text):
+        with self.lock:
+            if i == self.head:
+                self.open(i)
+                self.write(text)
+            else:
+                self.pending.setdefault(i, []).append(text)
+
+    # Slide i is done: its final text is written unless it was already streamed (None for slides left out of the notes)
+    def finish(self, i, transcript):
+        with self.lock:
+            self.finished[i] = transcript
+            while self.head in self.finished:
+                transcript = self.finished.pop(self.head)
+                if transcript and self.head not in self.opened:
+                    self.open(self.head)
+                    self.write(transcript)
+                self.head += 1
+                # The new head catches up with what it streamed so far
+                if self.pending.get(self.head):
+                    self.open(self.head)
+                    self.write("".join(self.pending.pop(self.head)))
+
+# Transcription of a whole PDF, independent of the GUI.
+# Progress (0-100) and status messages are reported through the optional callbacks.
+# A cache and a scheduler can be shared between several jobs, otherwise each job creates its own.
+class TranscriptJob:
+    def __init__(self, pdf_path, api_key=API_KEY, api_endpoint=API_ENDPOINT, model_name=MODEL_NAME, max_workers=MAX_WORKERS, use_cache=USE_CACHE, image_detail=IMAGE_DETAIL, batch_mode=BATCH_MODE,
+                 dedup=DEDUP_SLIDES, cache=None, scheduler=None, progress_callback=None, status_callback=None,
+                 metrics_callback=None, report_dir=RUN_REPORT_DIR, stream=STREAM_RESPONSES, live_callback=None,
+                 text_workers=TEXT_WORKERS):
+        self.pdf_path = pdf_path
+        self.api_key = api_key
+        self.api_endpoint = api_endpoint
+        self.model_name = model_name
+        self.max_workers = max(1, max_workers)
+        self.use_cache = use_cache
+        self.cache = cache
+        self.owns_cache = cache is None
+        self.scheduler = scheduler
+        self.journal = None
+        self.document = None
+        self.progress_callback = progress_callback
+        self.status_callback = status_callback
+        self.num_slides = 0
+        self.failed_slides = []
+        self.image_detail = image_detail
+        self.image_max_side = IMAGE_MAX_SIDE
+        self.image_quality = IMAGE_QUALITY
+        self.save_images = SAVE_IMAGES
+        self.batch_mode = batch_mode
+        self.dedup = dedup
+        self.duplicates = {}  # Skipped near-duplicate slides and the slide covering each of them
+        self.metrics = None  # RunMetrics of the current run, measures are also passed to metrics_callback
+        self.metrics_callback = metrics_callback
+        self.report_dir = report_dir  # Directory for the JSON report of the run (empty = no report)
+        self.stream = stream
+        self.text_workers = text_workers  # Processes extracting the text of large PDFs
+        self.live_callback = live_callback  # Receives the transcript in slide order as it is generated (see LiveTranscript)
+        self.live = None
+
+    def report_progress(self, value):
+        if self.progress_callback:
+            self.progress_callback(value)
+
+    def report_status(self, message):
+        if self.status_callback:
+            self.status_callback(message)
+
+    def record_usage(self, i, usage):
+        self.metrics.count("prompt_tokens", usage.get('prompt_tokens', 0), slide=i)
+        self.metrics.count("cached_prompt_tokens", (usage.get('prompt_tokens_details') or {}).get('cached_tokens', 0), slide=i)
+        self.metrics.count("completion_tokens", usage.get('completion_tokens', 0), slide=i)
+
+    # Slide finished by a previous run
+    def resume_slide(self, i):
+        self.metrics.slide_done(transcribed=False)
+        self.publish(i, self.journal.get(i))
+        return self.journal.get(i)
+
+    # Pass the final text of a finished slide to the live transcript
+    def publish(self, i, transcript):
+        if self.live is not None:
+            self.live.finish(i, transcript)
+
+    # Callback streaming the transcript of slide i to the live transcript, also measuring the time to the first token
+    def stream_to_live(self, i):
+        start = time.perf_counter()
+        first = [True]
+
+        def stream_callback(text):
+            if first[0]:
+                first[0] = False
+                self.metrics.add_span("first_token", time.perf_counter() - start, [i])
+            self.live.add(i, text)
+        return stream_callback
+
+    # Generate the transcript of a slide, reporting the outcome (None if it failed after all the retries)
+    # The status shows the throughput and the estimated time left after every slide.
+    def transcribe_slide(self, i, slide_text, context_slides, image, context_from_text=False):
+        try:
+            # The request time includes the wait for the rate limits and the retries
+            with self.metrics.span("request", [i]):
+                transcript = generate_transcript(
+                    slide_text, context_slides, self.api_key, self.api_endpoint, self.model_name,
+                    context_from_text=context_from_text, cache=self.cache, image=image,
+                    image_detail=self.image_detail, scheduler=self.scheduler,
+                    usage_callback=lambda usage: self.record_usage(i, usage),
+                    stream_callback=self.stream_to_live(i) if self.live is not None and self.stream else None)
+        except Exception as e:
+            self.metrics.slide_done()
+            self.publish(i, FAILED_TRANSCRIPT.format(slide=i + 1))
+            self.report_status(f"Failed to generate transcript for Slide {i + 1}: {e}")
+            return None
+
+        self.metrics.slide_done()
+        self.publish(i, transcript or FAILED_TRANSCRIPT.format(slide=i + 1))
+        if transcript:
+            self.journal.record(i, transcript)
+            status = self.metrics.status_line()
+            usage = self.metrics.slide(i)
+            if "prompt_tokens" in usage:
+                status += f" (Slide {i + 1}: {usage['prompt_tokens']} prompt tokens, {usage['cached_prompt_tokens']} cached)"
+            self.report_status(status)
+        else:
+            self.report_status(f"Failed to generate transcript for Slide {i + 1}.")
+        return transcript
+
+    def skip_duplicate(self, i, duplicate_of):
+        self.duplicates[i] = duplicate_of
+        self.metrics.count("skipped_duplicates", slide=i)
+        self.metrics.slide_done(transcribed=False)
+        self.publish(i, None)
+        self.report_status(f"Slide {i + 1} is a near-duplicate of Slide {duplicate_of + 1}, skipped.")
+
+    # Encode the slide image to send to the model (None when only the text is sent)
+    def prepare_image(self, i, page):
+        with self.metrics.span("encode", [i]):
+            if self.save_images:
+                os.makedirs(IMAGE_DIR, exist_ok=True)
+                page.save(os.path.join(IMAGE_DIR, f'slide_{i + 1}.jpg'), 'JPEG')
+            if self.image_detail == "none":
+                return None
+            return encode_page_image(page, self.image_max_side, self.image_quality)
+
+    # Generate the transcripts with up to max_workers requests in flight, submitting each slide as soon as it is rendered.
+    # Slides cannot wait for the previous transcript here, so the context is the extracted text of the previous slides.
+    def generate_transcripts_concurrently(self, slides):
+        num_pages = self.num_slides
+        slide_texts = []
+        results = [None] * num_pages
+        completed = 0
+
+        def collect(futures, return_when):
+            nonlocal completed
+            finished, _ = wait(futures, return_when=return_when)
+            for future in finished:
+                i = futures.pop(future)
+                results[i] = future.result()
+                completed += 1
+                self.report_progress(int(completed / num_pages * 100))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {}
+            for i, (page, slide_text, duplicate_of) in enumerate(slides):
+                slide_texts.append(slide_text)
+
+                # Slides finished by a previous run
+                if i in self.journal:
+                    results[i] = self.resume_slide(i)
+                    completed += 1
+                    continue
+
+                if duplicate_of is not None:
+                    self.skip_duplicate(i, duplicate_of)
+                    completed += 1
+                    continue
+
+                image = self.prepare_image(i, page)
+
+                context_slides = slide_texts[max(0, i - CONTEXT):i]
+                future = executor.submit(
+                    self.transcribe_slide, i, slide_text, context_slides, image, context_from_text=True)
+                futures[future] = i
+
+                # Stop pulling rendered pages while enough requests are queued
+                while len(futures) >= 2 * self.max_workers:
+                    collect(futures, FIRST_COMPLETED)
+
+            if futures:
+                collect(futures, ALL_COMPLETED)
+
+        # Keep the slide order regardless of the completion order
+        return results
+
+    # Write one request per slide to a JSONL batch file, submit it and reassemble the results in slide order.
+    # As in the concurrent mode, the context is the extracted text of the previous slides.
+    def generate_transcripts_in_batch(self, slides):
+        num_pages = self.num_slides
+        slide_texts = []
+        results = [None] * num_pages
+        cache_keys = {}
+        submitted = []
+
+        pdf_name = os.path.splitext(os.path.basename(self.pdf_path))[0]
+        batch_path = os.path.join(BATCH_DIR, f"{pdf_name}_{int(time.time())}.jsonl")
+        writer = BatchFileWriter(batch_path, self.api_endpoint)
+        try:
+            for i, (page, slide_text, duplicate_of) in enumerate(slides):
+                slide_texts.append(slide_text)
+
+                # Slides finished by a previous run
+                if i in self.journal:
+                    results[i] = self.resume_slide(i)
+                    continue
+
+                if duplicate_of is not None:
+                    self.skip_duplicate(i, duplicate_of)
+                    continue
+
+                image = self.prepare_image(i, page)
+                context_slides = slide_texts[max(0, i - CONTEXT):i]
+                payload = build_payload(slide_text, context_slides, self.model_name, True, image, self.image_detail)
+
+                # Slides already answered are not submitted again
+                if self.cache is not None:
+                    cache_keys[i] = self.cache.make_key(self.api_endpoint, payload)
+                    results[i] = self.cache.get(cache_keys[i])
+                if results[i] is None:
+                    writer.add(f"slide-{i}", payload)
+                    submitted.append(i)
+                else:
+                    self.metrics.slide_done(transcribed=False)
+                    self.publish(i, results[i])
+
+                self.report_progress(int((i + 1) / num_pages * 100))
+        finally:
+            writer.close()
+
+        if writer.count:
+            self.report_status(f"Submitting a batch of {writer.count} slides...")
+            self.report_progress(0)
+            client = BatchClient(self.api_key, self.api_endpoint)
+            with self.metrics.span("batch"):
+                bodies = client.run(batch_path, self.batch_status)
+            for i in submitted:
+                self.metrics.slide_done()
+            for i in range(num_pages):
+                body = bodies.get(f"slide-{i}")
+                if body is not None:
+                    if body.get('usage'):
+                        self.record_usage(i, body['usage'])
+                    results[i] = parse_transcript(body)
+                    self.journal.record(i, results[i])
+                    if self.cache is not None:
+                        self.cache.put(cache_keys[i], results[i])
+
+        for i in submitted:
+            self.publish(i, results[i] or FAILED_TRANSCRIPT.format(slide=i + 1))
+
+        for i, transcript in enumerate(results):
+            if not transcript and i not in self.duplicates:
+                self.report_status(f"Failed to generate transcript for Slide {i + 1}.")
+
+        return results
+
+    def batch_status(self, status, completed, total):
+        self.report_status(f"Batch {status}: {completed}/{total} slides processed.")
+        if total:
+            self.report_progress(int(completed / total * 100))
+
+    # Short summary of the run (failed and skipped slides, retries, prompt tokens and cache usage)
+    def summary(self):
+        summary = ""
+        if self.failed_slides:
+            summary += f" Failed slides: {', '.join(map(str, self.failed_slides))}."
+        if self.scheduler is not None and self.scheduler.retries:
+            summary += f" Retried requests: {self.scheduler.retries}."
+        if self.duplicates:
+            summary += f" Skipped near-duplicate slides: {format_report(self.duplicates)}."
+        counters = self.metrics.counters if self.metrics else {}
+        if counters.get("prompt_tokens"):
+            summary += (f" Prompt tokens: {counters['prompt_tokens']}"
+                        f" ({counters.get('cached_prompt_tokens', 0)} cached by the provider).")
+        if self.cache is not None:
+            summary += f" Cache: {self.cache.stats()}."
+        return summary.strip()
+
+    # Generate the transcripts of all the slides and pass the final transcript to save_transcript
+    def run(self, save_transcript):
+        try:
+            if self.use_cache and self.cache is None:
+                self.cache = ResponseCache()
+            if self.scheduler is None:
+                self.scheduler = RequestScheduler(max_concurrency=self.max_workers)
+
+            # The file is opened and parsed once, for the checkpoint, the text extraction and the rendering
+            self.document = PDFDocument(self.pdf_path)
+            self.num_slides = self.document.num_pages
+            self.metrics = RunMetrics(self.num_slides, self.metrics_callback)
+            if self.live_callback:
+                self.live = LiveTranscript(self.live_callback)
+
+            # Resume from the slides finished by a previous run with the same file and settings
+            self.journal = CheckpointJournal(self.pdf_path, {
+                "api_endpoint": self.api_endpoint,
+                "model_name": self.model_name,
+                "context_from_text": self.batch_mode or self.max_workers > 1,
+                "image_detail": self.image_detail,
+                "image_max_side": self.image_max_side,
+                "image_quality": self.image_quality
+            }, file_hash=self.document.content_hash)
+            if len(self.journal):
+                self.report_status(f"Resuming: {len(self.journal)} slides were already generated.")
+
+            transcripts = []
+
+            # Text extraction and rendering both run in the background, overlapping with each other
+            # and with the transcription of the previous slides
+            slide_texts = prefetch(iter_pdf_texts(self.document, self.text_workers, self.metrics), size=4 * TEXT_CHUNK)
+            pages = prefetch(iter_pdf_pages(
+                self.document, max_side=self.image_max_side, skip_pages=set(self.journal.transcripts), metrics=self.metrics))
+            slides = zip(pages, slide_texts)
+
+            # Near-duplicate slides are marked with the slide covering them and are not sent
+            if self.dedup:
+                slides = SlideDeduplicator().collapse(slides)
+            else:
+                slides = ((page, slide_text, None) for page, slide_text in slides)
+
+            self.report_progress(0)
+            self.report_status("Generating transcripts for each slide...")
+
+            if self.batch_mode:
+                results = self.generate_transcripts_in_batch(slides)
+            elif self.max_workers > 1:
+                results = self.generate_transcripts_concurrently(slides)
+            else:
+                results = []
+                for i, (page, slide_text, duplicate_of) in enumerate(slides):
+                    if i in self.journal:
+                        transcript = self.resume_slide(i)
+                    elif duplicate_of is not None:
+                        self.skip_duplicate(i, duplicate_of)
+                        transcript = None
+                    else:
+                        image = self.prepare_image(i, page)
+
+                        # self.report_status(f"Generating transcript for Slide {i + 1}...")
+                        context_slides = transcripts[-CONTEXT:]
+                        transcript = self.transcribe_slide(i, slide_text, context_slides, image)
+                    results.append(transcript)
+                    if transcript:
+                        transcripts.append(transcript)
+
+                    self.report_progress(int((i + 1) / self.num_slides * 100))
+
+            # Failed slides are kept as a placeholder so they are not silently dropped from the notes,
+            # skipped near-duplicates are covered by the notes of another slide
+            self.failed_slides = [
+                i + 1 for i, transcript in enumerate(results) if not transcript and i not in self.duplicates
+            ]
+            final_transcript = SLIDE_SEPARATOR.join(
+                transcript or FAILED_TRANSCRIPT.format(slide=i + 1)
+                for i, transcript in enumerate(results) if i not in self.duplicates
+            )
+            save_transcript(final_transcript)
+
+            # Keep the journal if some slides failed, so that re-running only retries them
+            if not self.failed_slides:
+                self.journal.remove()
+            return final_transcript
+        finally:
+            if self.cache is not None and self.owns_cache:
+                self.cache.close()
+            if self.journal is not None:
+                self.journal.close()
+            if self.document is not None:
+                self.document.close()
+            if self.metrics is not None:
+                self.metrics.finish()
+                if self.report_dir:
+                    self.save_report()
+
+    # Write the metrics of the run to a JSON file in report_dir
+    def save_report(self):
+        pdf_name = os.path.splitext(os.path.basename(self.pdf_path))[0]
+        path = os.path.join(self.report_dir, f"{pdf_name}_{int(time.time())}.json")
+        self.metrics.save(
+            path, pdf_path=self.pdf_path, model_name=self.model_name, max_workers=self.max_workers,
+            batch_mode=self.batch_mode, image_detail=self.image_detail, failed_slides=self.failed_slides,
+            skipped_duplicates={str(i + 1): kept + 1 for i, kept in self.duplicates.items()},
+            retried_requests=self.scheduler.retries if self.scheduler is not None else 0
+        )
+        self.report_status(f"Run report saved to {path}.")
@@ -1,193 +1,70 @@
 import os
-import base64
-import requests
-from pdf2image import convert_from_path
-import PyPDF2
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QPushButton, QFileDialog, QVBoxLayout,
     QLabel, QProgressBar, QLineEdit, QHBoxLayout, QComboBox, QMessageBox, QCheckBox,
-    QSpacerItem, QSizePolicy
+    QSpacerItem, QSizePolicy, QSpinBox, QPlainTextEdit
 )
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
-from PyQt5.QtGui import QPalette, QColor
-from dotenv import load_dotenv
+from PyQt5.QtGui import QPalette, QColor, QTextCursor
 import sys
 
-# Load environment variables from .env file or selected file
-load_dotenv()
-
-# Configuration
-API_KEY = os.getenv("API_KEY", "")
-API_ENDPOINT = os.getenv("API_ENDPOINT", "https://api.openai.com/v1/chat/completions")
-MODEL_NAME = os.getenv("MODEL_NAME", "gpt-4o-mini")
-CONTEXT = 5 # Number of previous transcripts to include as context
+from transcript_core import (
+    API_KEY, API_ENDPOINT, MODEL_NAME, MAX_WORKERS, USE_CACHE, IMAGE_DETAIL, BATCH_MODE,
+    TranscriptJob, partial_path, save_transcript_file
+)
+from slide_dedup import DEDUP_SLIDES
 
-IMAGE_DIR = "slide_images"  # Directory to save extracted images
 SETTINGS_FILE = "settings.txt"  # File to save/load settings
 
-# Ensure the image directory exists
-os.makedirs(IMAGE_DIR, exist_ok=True)
-
-# Function to encode an image to base64
-def encode_image(image_path):
-    with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode('utf-8')
-
-# Function to generate transcript for a single slide
-def generate_transcript(slide_text, previous_transcripts=[], api_key=API_KEY, api_endpoint=API_ENDPOINT, model_name=MODEL_NAME):
-    # Prepare the few-shot example
-    few_shot_prompt = """
-### Concepts Representation (1)
-
-A concept can be represented in multiple ways. Primarily, a concept is shaped by a **word** or a combination of terms. Examples include "car," "person," or "electric engine." These words serve as the basic building blocks of the concept.
-
-Additionally, a concept is defined by a **gloss**—a textual description that provides clarification and examples to ensure proper interpretation. The gloss helps disambiguate the meaning of the concept and offers context.
-
-Concepts are also linked semantically to other concepts. This is done through two main relationships:
-- **Hyponymy**, where a concept is related to a more generic term (e.g., "woman" is a more general concept than "daughter").
-- **Hypernymy**, where a concept is related to a more specific term (e.g., "artificial lake" is a more specific concept than "lake"). 
-
-These relationships help form a structured network of concepts that enable deeper understanding and categorization of information.
-
----
-
-### Boids
-
-The concept of **Boids** represents a foundational example of **Computational Swarm Intelligence**, illustrating how simple agents can simulate the flocking behavior of birds. These agents, referred to as "boids" (short for "bird-oid objects"), operate under the assumption that each boid perceives the angle and distance of its neighboring boids, as proposed by Reynolds in 1986.
-
-Boids adhere to three fundamental rules that enable them to exhibit complex behaviors:
-
-1. **Separation**: Each boid maintains a specified distance from its neighboring boids to avoid crowding and collisions. This rule ensures that the boids do not cluster too closely together, which could lead to chaos.
-
-2. **Cohesion**: A boid moves towards the center of mass of its neighboring boids. This rule promotes group unity, encouraging boids to stay together as a cohesive flock.
-
-3. **Alignment**: A boid aligns its direction and angle with those of its neighboring boids. This rule allows for synchronized movement, contributing to the overall fluidity of the flock's motion.
-
-This model exemplifies how complex behaviors can emerge from straightforward rules, highlighting the principles of swarm intelligence in action.
-"""
-
-    # Include previous transcripts as context if available
-    context_text = ""
-    if previous_transcripts:
-        context_text = "\n\n---\n".join(previous_transcripts)
-
-    # Complete prompt with few-shot example, extracted text, and context
-    prompt = f"""Please generate the notes for the slide above. You should follow the following structure, with the slide title, followed by its content rewritten to be readable and explain everything, ending with "---".
-
-IMPORTANT: you should only respond with the provided format, do not add any additional information, directly output the requested content. You should also avoid to repeat information between multiple slides.
-
-Here is an output example of the expected format:
-```
-{few_shot_prompt}
-```
-Here is the partially extracted text from the slide, you should use this information together with the provided image to generate the notes:
-```
-{slide_text}
-```
-Here are the transcripts from some of the previous slides to use as additional context, you should NOT repeat information in here, reference them if needed to do so:
-```
-{context_text}
-```
-"""
-
-    # Prepare the payload
-    payload = {
-        "model": model_name,
-        "messages": [
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ],
-        "max_tokens": 1000,
-        "temperature": 0.7,
-        "stop": ["---"]
-    }
-
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}"
-    }
-
-    # Send the request to the OpenAI API
-    response = requests.post(api_endpoint, headers=headers, json=payload)
-
-    if response.status_code == 200:
-        response_data = response.json()
-        transcript = response_data['choices'][0]['message']['content'].strip()
-        # Remove everything before "###" if needed
-        if "###" in transcript:
-            transcript = transcript[transcript.find("###"):]
-        return transcript
-    else:
-        return None
-
 # Worker thread to process the PDF
 class PDFProcessorThread(QThread):
     progress = pyqtSignal(int)
     status = pyqtSignal(str)
+    partial = pyqtSignal(str)
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
 
-    def __init__(self, pdf_path, api_key, api_endpoint, model_name, save_to_clipboard, save_path):
+    def __init__(self, pdf_path, api_key, api_endpoint, model_name, save_to_clipboard, save_path, max_workers=MAX_WORKERS, use_cache=USE_CACHE, image_detail=IMAGE_DETAIL, batch_mode=BATCH_MODE, dedup=DEDUP_SLIDES):
         super().__init__()
-        self.pdf_path = pdf_path
-        self.api_key = api_key
-        self.api_endpoint = api_endpoint
-        self.model_name = model_name
         self.save_to_clipboard = save_to_clipboard
         self.save_path = save_path
-
-    # Function to extract text from PDF
-    def extract_text_from_pdf(self,pdf_path):
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            slide_texts = []
-            i = 0
-            for page in pdf_reader.pages:
-                i += 1
-                slide_texts.append(page.extract_text() if page.extract_text() else "")
-                self.progress.emit(int(i / len(pdf_reader.pages) * 100))
-        return slide_texts
+        self.live_file = None
+        self.job = TranscriptJob(
+            pdf_path, api_key, api_endpoint, model_name, max_workers, use_cache, image_detail, batch_mode, dedup,
+            progress_callback=self.progress.emit, status_callback=self.status.emit, live_callback=self.write_live)
+
+    # The notes are shown and written to a partial file next to the save file as they are generated,
+    # the partial file then replaces the save file with the final transcript
+    def write_live(self, text):
+        if self.live_file:
+            self.live_file.write(text)
+            self.live_file.flush()
+        self.partial.emit(text)
+
+    def close_live_file(self):
+        if self.live_file:
+            self.live_file.close()
+            self.live_file = None
+
+    def save_transcript(self, final_transcript):
+        self.close_live_file()
+        if self.save_to_clipboard:
+            clipboard = QApplication.instance().clipboard()
+            clipboard.setText(final_transcript)
+        else:
+            save_transcript_file(self.save_path, final_transcript)
 
     def run(self):
         try:
-            self.status.emit("Extracting slides from PDF...")
-            pages = convert_from_path(self.pdf_path)
-            slide_texts = self.extract_text_from_pdf(self.pdf_path)
-            transcripts = []
-            
-            self.progress.emit(0)
-            self.status.emit("Generating transcripts for each slide...")
-
-            for i, (page, slide_text) in enumerate(zip(pages, slide_texts)):
-                image_path = os.path.join(IMAGE_DIR, f'slide_{i + 1}.jpg')
-                page.save(image_path, 'JPEG')
-
-                # self.status.emit(f"Generating transcript for Slide {i + 1}...")
-                context_slides = transcripts[-CONTEXT:]
-                transcript = generate_transcript(slide_text, context_slides, self.api_key, self.api_endpoint, self.model_name)
-
-                if transcript:
-                    transcripts.append(transcript)
-                    self.status.emit(f"Transcript for Slide {i + 1} generated successfully.\n---------------------\n")
-                else:
-                    self.status.emit(f"Failed to generate transcript for Slide {i + 1}.")
-
-                self.progress.emit(int((i + 1) / len(pages) * 100))
-
-            final_transcript = "\n\n---\n".join(transcripts)
-
-            if self.save_to_clipboard:
-                clipboard = QApplication.instance().clipboard()
-                clipboard.setText(final_transcript)
-                self.finished.emit("All transcripts have been generated and copied to clipboard.")
-            else:
-                with open(self.save_path, 'w', encoding='utf-8') as f:
-                    f.write(final_transcript)
-                self.finished.emit("All transcripts have been generated and saved.")
+            if not self.save_to_clipboard:
+                self.live_file = open(partial_path(self.save_path), 'w', encoding='utf-8')
+            self.job.run(self.save_transcript)
+            destination = "copied to clipboard" if self.save_to_clipboard else "saved"
+            self.finished.emit(f"All transcripts have been generated and {destination}. {self.job.summary()}".strip())
         except Exception as e:
             self.error.emit(str(e))
+        finally:
+            self.close_live_file()
 
 # GUI Setup
 class MainWindow(QMainWindow):
@@ -243,6 +120,20 @@ class MainWindow(QMainWindow):
                 border: 1px solid #5c5c5c;
                 border-radius: 5px;
             }
+            QSpinBox {
+                padding: 5px;
+                background-color: #3c3f41;
+                color: #ffffff;
+                border: 1px solid #5c5c5c;
+                border-radius: 5px;
+            }
+            QPlainTextEdit {
+                padding: 5px;
+                background-color: #3c3f41;
+                color: #ffffff;
+                border: 1px solid #5c5c5c;
+                border-radius: 5px;
+            }
             QCheckBox {
                 color: #ffffff;
             }
@@ -264,6 +155,7 @@ class MainWindow(QMainWindow):
         api_key = API_KEY
         api_endpoint = API_ENDPOINT
         model_name = MODEL_NAME
+        max_workers = MAX_WORKERS
 
         if os.path.exists(SETTINGS_FILE):
             with open(SETTINGS_FILE, 'r') as f:
@@ -272,6 +164,8 @@ class MainWindow(QMainWindow):
                     api_key = settings[0]
                     api_endpoint = settings[1]
                     model_name = settings[2]
+                if len(settings) >= 4 and settings[3].isdigit():
+                    max_workers = int(settings[3])
 
         # PDF File Selection
         top_layout = QHBoxLayout()
@@ -326,6 +220,39 @@ class MainWindow(QMainWindow):
 
         self.model_combo.currentTextChanged.connect(self.model_changed)
 
+        # Concurrent Requests
+        workers_label = QLabel("Concurrent Requests (1 = sequential, uses previous transcripts as context):")
+        main_layout.addWidget(workers_label)
+
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, 32)
+        self.workers_spin.setValue(max_workers)
+        main_layout.addWidget(self.workers_spin)
+
+        # Image Detail
+        image_detail_label = QLabel("Slide Image Detail (\"none\" only sends the extracted text):")
+        main_layout.addWidget(image_detail_label)
+
+        self.image_detail_combo = QComboBox()
+        self.image_detail_combo.addItems(["auto", "low", "high", "none"])
+        self.image_detail_combo.setCurrentText(IMAGE_DETAIL)
+        main_layout.addWidget(self.image_detail_combo)
+
+        # Batch Option
+        self.batch_mode_checkbox = QCheckBox("Batch mode (cheaper, results can take up to 24 hours)")
+        self.batch_mode_checkbox.setChecked(BATCH_MODE)
+        main_layout.addWidget(self.batch_mode_checkbox)
+
+        # Cache Option
+        self.use_cache_checkbox = QCheckBox("Reuse cached transcripts for unchanged slides")
+        self.use_cache_checkbox.setChecked(USE_CACHE)
+        main_layout.addWidget(self.use_cache_checkbox)
+
+        # Deduplication Option
+        self.dedup_checkbox = QCheckBox("Skip near-duplicate slides (e.g. slides revealing one bullet at a time)")
+        self.dedup_checkbox.setChecked(DEDUP_SLIDES)
+        main_layout.addWidget(self.dedup_checkbox)
+
         # Save Options
         self.save_to_clipboard_checkbox = QCheckBox("Save to Clipboard")
         main_layout.addWidget(self.save_to_clipboard_checkbox)
@@ -357,6 +284,13 @@ class MainWindow(QMainWindow):
         # do not stretch the window when text is too long
         self.status_label.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Fixed)
 
+        # Live Preview of the notes being generated
+        self.preview_edit = QPlainTextEdit()
+        self.preview_edit.setReadOnly(True)
+        self.preview_edit.setPlaceholderText("The notes will appear here as they are generated.")
+        self.preview_edit.setMinimumHeight(150)
+        main_layout.addWidget(self.preview_edit)
+
         self.start_button.clicked.connect(self.start_processing)
 
     def select_pdf(self):
@@ -409,19 +343,29 @@ class MainWindow(QMainWindow):
             f.write(f"{self.api_key_edit.text()}\n")
             f.write(f"{endpoint_to_use}\n")
             f.write(f"{model_name_to_use}\n")
+            f.write(f"{self.workers_spin.value()}\n")
 
         # Disable inputs during processing
         self.set_all_inputs_enabled(False)
 
         self.processor_thread = PDFProcessorThread(
             pdf_path, self.api_key_edit.text(), endpoint_to_use,
-            model_name_to_use, save_to_clipboard, save_path)
+            model_name_to_use, save_to_clipboard, save_path, self.workers_spin.value(),
+            self.use_cache_checkbox.isChecked(), self.image_detail_combo.currentText(),
+            self.batch_mode_checkbox.isChecked(), self.dedup_checkbox.isChecked())
         self.processor_thread.progress.connect(self.progress_bar.setValue)
         self.processor_thread.status.connect(self.status_label.setText)
+        self.preview_edit.clear()
+        self.processor_thread.partial.connect(self.append_preview)
         self.processor_thread.finished.connect(self.processing_finished)
         self.processor_thread.error.connect(self.processing_error)
         self.processor_thread.start()
 
+    def append_preview(self, text):
+        self.preview_edit.moveCursor(QTextCursor.End)
+        self.preview_edit.insertPlainText(text)
+        self.preview_edit.ensureCursorVisible()
+
     def processing_finished(self, message):
         self.status_label.setText(message)
         QMessageBox.information(self, "Processing Finished", message)
@@ -438,6 +382,11 @@ class MainWindow(QMainWindow):
         self.browse_button.setEnabled(enabled)
         self.api_key_edit.setEnabled(enabled)
         self.model_combo.setEnabled(enabled)
+        self.workers_spin.setEnabled(enabled)
+        self.use_cache_checkbox.setEnabled(enabled)
+        self.image_detail_combo.setEnabled(enabled)
+        self.batch_mode_checkbox.setEnabled(enabled)
+        self.dedup_checkbox.setEnabled(enabled)
         self.custom_settings_widget.setEnabled(enabled)
         self.save_to_clipboard_checkbox.setEnabled(enabled)
         self.save_path_edit.setEnabled(enabled)
@@ -0,0 +1,112 @@
+import numpy as np
+
+# ----------------------------- Configuration ----------------------------- #
+
+sample_rate = 16000  # Sample rate of the audio blocks
+window_s = 30  # Longest window the speech segments are packed into
+vad_threshold_db = -45  # Frames louder than this (in dB relative to full scale) are speech
+vad_frame_ms = 30  # Length of the frames the loudness is measured on
+vad_min_silence_s = 0.6  # Shorter pauses stay inside the speech segment
+vad_pad_s = 0.2  # Audio kept before and after each speech segment
+vad_gap_s = 0.3  # Silence inserted between the segments packed in a window
+vad_split_search_s = 5  # A segment longer than a window is split at the quietest frame of its last seconds
+
+# ----------------------------- Voice Activity Detection ----------------------------- #
+
+def iter_speech_segments(blocks, max_length_s=window_s, threshold_db=vad_threshold_db, target_sr=sample_rate):
+    """
+    Finds the speech in audio blocks from the loudness of short frames, yielding (start sample, audio) for each
+    speech segment, padded by vad_pad_s and never longer than max_length_s. Pauses shorter than vad_min_silence_s
+    do not end a segment. Only the current segment is kept in memory.
+    """
+    frame_length = int(target_sr * vad_frame_ms / 1000)
+    pad_frames = int(vad_pad_s * 1000 / vad_frame_ms)
+    min_silence_frames = int(vad_min_silence_s * 1000 / vad_frame_ms)
+    max_frames = int(max_length_s * 1000 / vad_frame_ms)
+    search_frames = min(max_frames - 1, int(vad_split_search_s * 1000 / vad_frame_ms))
+
+    frames, energies = [], []  # Frames of the current segment (or the padding before the next one) and their loudness
+    first_frame = 0  # Index of frames[0] in the recording
+    in_speech = False
+    silent_frames = 0
+    frame_index = 0
+    remainder = np.zeros(0, dtype=np.float32)
+
+    for block in blocks:
+        remainder = np.concatenate([remainder, block])
+        usable = len(remainder) // frame_length * frame_length
+        for frame in remainder[:usable].reshape(-1, frame_length):
+            energy = 10 * np.log10(np.mean(frame ** 2) + 1e-10)
+            loud = energy > threshold_db
+            frames.append(frame)
+            energies.append(energy)
+            frame_index += 1
+
+            if not in_speech:
+                if loud:
+                    in_speech = True
+                    silent_frames = 0
+                elif len(frames) > pad_frames:
+                    # Keep only the padding before a possible segment
+                    del frames[0], energies[0]
+                    first_frame += 1
+                continue
+
+            silent_frames = 0 if loud else silent_frames + 1
+            if silent_frames >= min_silence_frames:
+                # End of the segment, the silence after the padding becomes the padding of the next one.
+                # After a split, the segment can be nothing but silence: it is dropped.
+                keep = len(frames) - silent_frames + pad_frames
+                if keep > 0 and silent_frames < len(frames):
+                    yield first_frame * frame_length, np.concatenate(frames[:keep])
+                kept_padding = min(pad_frames, len(frames))
+                del frames[:len(frames) - kept_padding], energies[:len(energies) - kept_padding]
+                first_frame = frame_index - len(frames)
+                in_speech = False
+            elif len(frames) >= max_frames:
+                # Too long for a window, split where the speaker is the quietest
+                split = max_frames - search_frames + int(np.argmin(energies[-search_frames:]))
+                yield first_frame * frame_length, np.concatenate(frames[:split])
+                del frames[:split], energies[:split]
+                first_frame += split
+                # The silence before the split is not part of what is left
+                silent_frames = min(silent_frames, len(frames))
+        remainder = remainder[usable:]
+
+    if in_speech:
+        keep = len(frames) - max(0, silent_frames - pad_frames)
+        if keep > 0 and silent_frames < len(frames):
+            yield first_frame * frame_length, np.concatenate(frames[:keep])
+
+def iter_speech_windows(segments, window_s=window_s, gap_s=vad_gap_s, target_sr=sample_rate):
+    """
+    Packs consecutive speech segments into windows of at most window_s seconds, separated by gap_s seconds of silence.
+    Yields (window audio, spans), each span being (offset in the window, start in the recording, length) in samples.
+    """
+    window_length = int(window_s * target_sr)
+    gap = np.zeros(int(gap_s * target_sr), dtype=np.float32)
+    parts, spans, length = [], [], 0
+    for start, audio in segments:
+        if parts and length + len(gap) + len(audio) > window_length:
+            yield np.concatenate(parts), spans
+            parts, spans, length = [], [], 0
+        if parts:
+            parts.append(gap)
+            length += len(gap)
+        spans.append((length, start, len(audio)))
+        parts.append(audio)
+        length += len(audio)
+    if parts:
+        yield np.concatenate(parts), spans
+
+def to_recording_time(seconds, spans, target_sr=sample_rate):
+    """
+    Maps a time in a packed window to the recording's timeline. Times in the silence between two segments
+    are moved to the start of the next one.
+    """
+    position = seconds * target_sr
+    for offset, start, length in spans:
+        if position < offset + length:
+            return (start + max(0.0, position - offset)) / target_sr
+    offset, start, length = spans[-1]
+    return (start + length) / target_sr